@@ -0,0 +1,140 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Raised by admit() when work has to be shed"""
+
+    def __init__(self, reason, retry_after, status_code=503):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+    def headers(self):
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucket:
+    """Refills at rate tokens per second up to burst; one token per title"""
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, amount, now):
+        """Spend tokens for amount titles; return 0.0 or seconds until they'd be available"""
+        self._refill(now)
+        # A request bigger than the burst only has to wait for a full bucket
+        cost = min(amount, self.burst)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def charge(self, amount, now):
+        """Spend tokens unconditionally, possibly going into debt"""
+        self._refill(now)
+        self.tokens -= amount
+
+
+class AdmissionController:
+    """
+    Bounds the classification work queued on this instance
+
+    Work is counted in titles, not requests, so one huge payload weighs as
+    much as the many small ones it displaces. A request is admitted while
+    the titles already queued plus its own stay within max_queued_titles
+    (or when nothing is queued, so an oversized request can't starve).
+    With client_rate set, each client (keyed by the caller) also gets a
+    token bucket of client_rate titles per second with client_burst depth.
+    """
+
+    def __init__(self, max_queued_titles, client_rate=0.0, client_burst=0,
+                 max_clients=10000, retry_after=1.0):
+        self.max_queued_titles = max_queued_titles
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.retry_after = retry_after
+
+        self.queued_titles = 0
+        self.peak_queued_titles = 0
+        self.admitted = 0
+        self.shed_overloaded = 0
+        self.shed_rate_limited = 0
+        self.shed_titles = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, client, now):
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.client_rate, self.client_burst, now)
+            if len(self._buckets) > self.max_clients:
+                # Forget the least recently seen client; it restarts with a full bucket
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    def admit(self, titles, client=None):
+        """Reserve room for titles or raise Overloaded; pair with release()"""
+        now = time.monotonic()
+        with self._lock:
+            if self.queued_titles and self.queued_titles + titles > self.max_queued_titles:
+                self.shed_overloaded += 1
+                self.shed_titles += titles
+                raise Overloaded("Server is busy, retry shortly", self.retry_after)
+
+            if client is not None and self.client_rate > 0:
+                wait = self._bucket(client, now).take(titles, now)
+                if wait > 0:
+                    self.shed_rate_limited += 1
+                    self.shed_titles += titles
+                    raise Overloaded("Rate limit exceeded for this client", wait, status_code=429)
+
+            self.admitted += 1
+            self._reserve(titles)
+
+    def release(self, titles):
+        with self._lock:
+            self.queued_titles -= titles
+
+    @contextmanager
+    def track(self, titles, client=None):
+        """Count already-accepted work (e.g. a stream's next chunk) without shedding it"""
+        now = time.monotonic()
+        with self._lock:
+            if client is not None and self.client_rate > 0:
+                self._bucket(client, now).charge(titles, now)
+            self._reserve(titles)
+        try:
+            yield
+        finally:
+            self.release(titles)
+
+    def _reserve(self, titles):
+        self.queued_titles += titles
+        self.peak_queued_titles = max(self.peak_queued_titles, self.queued_titles)
+
+    def snapshot(self):
+        return {
+            "queued_titles": self.queued_titles,
+            "peak_queued_titles": self.peak_queued_titles,
+            "max_queued_titles": self.max_queued_titles,
+            "admitted": self.admitted,
+            "shed_overloaded": self.shed_overloaded,
+            "shed_rate_limited": self.shed_rate_limited,
+            "shed_titles": self.shed_titles,
+            "clients": len(self._buckets),
+        }
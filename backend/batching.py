@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import deque
+
+from ml.metrics import SIZE_BUCKETS, metrics
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile of an unsorted sample, 0.0 when empty"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+class BatchStats:
+    """Running counters plus a window of recent batch sizes and queue waits"""
+
+    def __init__(self, window=1024):
+        self.batches = 0
+        self.requests = 0
+        self.titles = 0
+        self.batch_sizes = deque(maxlen=window)
+        self.queue_waits_ms = deque(maxlen=window)
+
+    def record(self, batch_size, waits_ms):
+        self.batches += 1
+        self.requests += len(waits_ms)
+        self.titles += batch_size
+        self.batch_sizes.append(batch_size)
+        self.queue_waits_ms.extend(waits_ms)
+
+    def snapshot(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "titles": self.titles,
+            "batch_size_p50": percentile(self.batch_sizes, 50),
+            "batch_size_max": max(self.batch_sizes, default=0),
+            "queue_wait_ms_p50": percentile(self.queue_waits_ms, 50),
+            "queue_wait_ms_p99": percentile(self.queue_waits_ms, 99),
+        }
+
+
+class MicroBatcher:
+    """
+    Gathers titles from concurrent requests into one classify call
+
+    A batch closes after window_ms from its first request or once it holds
+    max_titles titles, whichever comes first. The combined batch runs in
+    the default executor so the event loop keeps accepting requests, and
+    each caller gets back only the slice for its own titles.
+    """
+
+    def __init__(self, classify, window_ms=3.0, max_titles=512):
+        self.classify_fn = classify
+        self.window = window_ms / 1000
+        self.max_titles = max_titles
+        self.stats = BatchStats()
+        self._queue = None
+        self._worker = None
+
+    async def classify(self, titles):
+        """Return (labels, confidences) for titles via the shared batch"""
+        if not titles:
+            return [], []
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((titles, future, time.perf_counter()))
+        return await future
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.window
+
+            while size < self.max_titles:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            await self._flush(batch, size)
+
+    async def _flush(self, batch, size):
+        started = time.perf_counter()
+        waits_ms = [(started - enqueued) * 1000 for _, _, enqueued in batch]
+        titles = [title for item_titles, _, _ in batch for title in item_titles]
+
+        try:
+            labels, confidences = await asyncio.get_running_loop().run_in_executor(
+                None, self.classify_fn, titles
+            )
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats.record(size, waits_ms)
+        metrics.observe("tidytabs_batch_titles", size, buckets=SIZE_BUCKETS)
+        for wait_ms in waits_ms:
+            metrics.observe("tidytabs_stage_seconds", wait_ms / 1000, stage="queue_wait")
+
+        offset = 0
+        for item_titles, future, _ in batch:
+            end = offset + len(item_titles)
+            if not future.done():
+                future.set_result((labels[offset:end], confidences[offset:end]))
+            offset = end
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+
+
+def titles_key(titles):
+    """
+    Digest of the raw title list
+
+    Runs on the event loop for every request, so it is one join and one
+    hash in C; normalizing each title here would stall other requests and
+    repeat work classify_titles does anyway in the worker thread.
+    """
+    digest = hashlib.blake2b("\x1f".join(titles).encode("utf-8", "surrogatepass"), digest_size=16)
+    # Title lengths keep a separator inside a title from matching a split
+    digest.update(",".join(map(str, map(len, titles))).encode())
+    return digest.digest()
+
+
+def body_key(body, model_version, media_type="application/json"):
+    """
+    Digest of the raw body for one model version and response encoding, so
+    a reload never serves stale responses and JSON and msgpack never mix
+    """
+    digest = hashlib.blake2b(body, digest_size=16)
+    digest.update(f"{model_version}\x1f{media_type}".encode("utf-8"))
+    return digest.digest()
+
+
+class SingleFlight:
+    """
+    Run one computation per key no matter how many callers ask at once
+
+    The computation runs as its own task, so a caller that disconnects
+    (and is cancelled) doesn't cancel it for the others still waiting.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def run(self, key, compute):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self):
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+
+class ResponseCache:
+    """
+    Tiny TTL cache of serialized responses for immediate repeats
+
+    Every entry lives for the same TTL and is (re)inserted at the back, so
+    entries are ordered by expiry: expired ones are dropped from the front
+    on every get/put. Bounded by entry count and by the total size of the
+    cached bodies; a body bigger than max_bytes is not cached.
+    """
+
+    def __init__(self, ttl_seconds=2.0, maxsize=1024, max_bytes=32 * 1024 * 1024):
+        self.ttl = ttl_seconds
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def _pop_oldest(self):
+        _, (_, value) = self._entries.popitem(last=False)
+        self.bytes -= len(value)
+
+    def _expire(self, now):
+        while self._entries and next(iter(self._entries.values()))[0] < now:
+            self._pop_oldest()
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        self._expire(time.monotonic())
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        if self.ttl <= 0 or len(value) > self.max_bytes:
+            return
+        now = time.monotonic()
+        self._expire(now)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(previous[1])
+        self._entries[key] = (now + self.ttl, value)
+        self.bytes += len(value)
+        while len(self._entries) > self.maxsize or self.bytes > self.max_bytes:
+            self._pop_oldest()
+
+    def snapshot(self):
+        return {
+            "response_cache_hits": self.hits,
+            "response_cache_misses": self.misses,
+            "response_cache_entries": len(self._entries),
+            "response_cache_bytes": self.bytes,
+        }
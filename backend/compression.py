@@ -0,0 +1,244 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+
+# zstd is optional; without it zstd request bodies get a 415 and responses
+# fall back to gzip
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# A zstd block inflates to at most 128 KB and the smallest (RLE) block is
+# 4 bytes, which bounds how much one slice of input can produce
+ZSTD_MAX_RATIO = 128 * 1024 // 4
+ZSTD_MIN_STEP = 16
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class MalformedBody(ValueError):
+    pass
+
+
+class UnsupportedEncoding(Exception):
+    pass
+
+
+class GzipDecoder:
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0
+        # 16 + MAX_WBITS: expect a gzip header and trailer
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def decode(self, chunk):
+        # Never inflate more than one byte past the remaining budget
+        data = self._decompressor.decompress(chunk, self.limit - self.size + 1)
+        self.size += len(data)
+        if self.size > self.limit:
+            raise BodyTooLarge()
+        return data
+
+    def finish(self):
+        if not self._decompressor.eof:
+            raise MalformedBody("Truncated gzip body")
+        return b""
+
+
+class ZstdDecoder:
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decode(self, chunk):
+        # decompressobj has no output cap, so feed it only as much input as
+        # could inflate to the remaining budget (one RLE block per 4 bytes)
+        out = []
+        view = memoryview(chunk)
+        while view and not self._decompressor.eof:
+            step = max(ZSTD_MIN_STEP, (self.limit - self.size) // ZSTD_MAX_RATIO)
+            data = self._decompressor.decompress(view[:step])
+            view = view[step:]
+            self.size += len(data)
+            if self.size > self.limit:
+                raise BodyTooLarge()
+            out.append(data)
+        return b"".join(out)
+
+    def finish(self):
+        if not self._decompressor.eof:
+            raise MalformedBody("Truncated zstd body")
+        return b""
+
+
+class GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def encode(self, data, final):
+        out = self._compressor.compress(data)
+        # Sync-flush every chunk so streamed responses still arrive incrementally
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def encode(self, data, final):
+        out = self._compressor.compress(data)
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return out + self._compressor.flush(flush_mode)
+
+
+def request_decoder(encoding, limit):
+    if encoding == "gzip":
+        return GzipDecoder(limit)
+    if encoding == "zstd" and zstandard is not None:
+        return ZstdDecoder(limit)
+    raise UnsupportedEncoding(encoding)
+
+
+def response_encoding(accept_encoding):
+    """Best supported coding the client accepts: zstd, then gzip, else None"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        accepted.add(coding.strip().lower())
+    if "zstd" in accepted and zstandard is not None:
+        return "zstd"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    gzip/zstd request bodies and negotiated response compression
+
+    Compressed request bodies are inflated chunk by chunk as the app reads
+    them and rejected with 413 once they exceed max_body_bytes, so a small
+    compressed bomb can't exhaust memory. Responses are compressed only when
+    the client accepts an encoding and the body is at least minimum_size
+    bytes (or is streamed).
+    """
+
+    def __init__(self, app, minimum_size=1024, max_body_bytes=8 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if request_encoding != "identity":
+            try:
+                decoder = request_decoder(request_encoding, self.max_body_bytes)
+            except UnsupportedEncoding:
+                response = JSONResponse(
+                    status_code=415, content={"error": f"Unsupported Content-Encoding: {request_encoding}"}
+                )
+                await response(scope, receive, send)
+                return
+            scope = dict(scope)
+            scope["headers"] = [
+                (k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")
+            ]
+            receive = self.decoding_receive(receive, decoder)
+
+        encoding = response_encoding(headers.get("accept-encoding", ""))
+        if encoding is not None:
+            send = self.encoding_send(send, encoding)
+
+        started = False
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracking_send)
+        except BodyTooLarge:
+            if started:
+                raise
+            response = JSONResponse(status_code=413, content={"error": "Request body too large"})
+            await response(scope, receive, send)
+        except MalformedBody as e:
+            if started:
+                raise
+            response = JSONResponse(status_code=400, content={"error": str(e)})
+            await response(scope, receive, send)
+
+    def decoding_receive(self, receive, decoder):
+        async def receive_decoded():
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            try:
+                body = decoder.decode(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body += decoder.finish()
+            except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as e:
+                raise MalformedBody(f"Malformed compressed body: {e}")
+            return {**message, "body": body}
+
+        return receive_decoded
+
+    def encoding_send(self, send, encoding):
+        state = {"start": None, "encoder": None, "passthrough": False}
+
+        async def send_encoded(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                headers = Headers(raw=message["headers"])
+                state["passthrough"] = "content-encoding" in headers or message["status"] in (204, 304)
+                if state["passthrough"]:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if state["start"] is not None:
+                start, state["start"] = state["start"], None
+                headers = MutableHeaders(raw=start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    # Small bodies aren't worth compressing
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                state["encoder"] = ZstdEncoder() if encoding == "zstd" else GzipEncoder()
+                body = state["encoder"].encode(body, final=not more_body)
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({**message, "body": body})
+                return
+
+            body = state["encoder"].encode(body, final=not more_body)
+            await send({**message, "body": body})
+
+        return send_encoded
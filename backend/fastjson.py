@@ -0,0 +1,135 @@
+import json
+from typing import Annotated
+
+from pydantic import Field, TypeAdapter, ValidationError
+
+# orjson is optional; without it the fast path still skips pydantic but
+# decodes and encodes with the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RESPONSE_FORMATS = ("titles", "indices")
+
+# TabData's optional scalar fields. Values already of the plain type are
+# taken as is; anything else goes through pydantic's lax-mode coercion
+# ("true", "50", 1, ...) so both paths accept the same bodies.
+LAX_FIELDS = {
+    "include_confidences": TypeAdapter(bool),
+    "deadline_ms": TypeAdapter(Annotated[float, Field(gt=0)]),
+}
+
+
+class PayloadError(ValueError):
+    """
+    A rejected payload, reported like one pydantic validation error
+
+    errors() has the same type/loc/msg shape as ValidationError.errors(),
+    so a 422 looks the same whether or not the fast path handled it.
+    """
+
+    def __init__(self, message, loc=(), error_type="value_error"):
+        super().__init__(message)
+        self.loc = tuple(loc)
+        self.type = error_type
+
+    def errors(self):
+        return [{"type": self.type, "loc": list(self.loc), "msg": str(self)}]
+
+
+def coerce_field(name, value):
+    """Validate value for an optional TabData field as pydantic's lax mode would"""
+    try:
+        return LAX_FIELDS[name].validate_python(value)
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise PayloadError(error["msg"], (name, *error["loc"]), error["type"])
+
+
+def loads(body):
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(obj):
+    """Serialize obj to compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def parse_tab_payload(body, max_titles, max_title_length):
+    """
+    Decode and validate a /categorize_local body without pydantic
+
+    Returns:
+        Dict of TabData fields
+
+    Raises:
+        PayloadError: with a message suitable for a 422 response
+    """
+    try:
+        data = loads(body)
+    except ValueError as e:
+        raise PayloadError(f"Invalid JSON: {e}", error_type="json_invalid")
+    return validate_tab_payload(data, max_titles, max_title_length)
+
+
+def validate_tab_payload(data, max_titles, max_title_length):
+    """
+    Validate an already decoded /categorize_local body
+
+    Checks only what the handler relies on: a list of strings under the
+    size caps plus the optional fields.
+
+    Returns:
+        Dict of TabData fields
+
+    Raises:
+        PayloadError: with a message suitable for a 422 response
+    """
+    if not isinstance(data, dict):
+        raise PayloadError("Input should be an object", error_type="model_type")
+
+    if "titles" not in data:
+        raise PayloadError("Field required", ("titles",), "missing")
+    titles = data["titles"]
+    if not isinstance(titles, list):
+        raise PayloadError("Input should be a valid array", ("titles",), "list_type")
+    if len(titles) > max_titles:
+        raise PayloadError(
+            f"List should have at most {max_titles} items after validation, not {len(titles)}",
+            ("titles",), "too_long",
+        )
+    for i, title in enumerate(titles):
+        if type(title) is not str:
+            raise PayloadError("Input should be a valid string", ("titles", i), "string_type")
+        if len(title) > max_title_length:
+            raise PayloadError(
+                f"String should have at most {max_title_length} characters",
+                ("titles", i), "string_too_long",
+            )
+
+    response_format = data.get("response_format", "titles")
+    if response_format not in RESPONSE_FORMATS:
+        raise PayloadError(
+            "Input should be " + " or ".join(f"'{f}'" for f in RESPONSE_FORMATS),
+            ("response_format",), "literal_error",
+        )
+
+    include_confidences = data.get("include_confidences", False)
+    if type(include_confidences) is not bool:
+        include_confidences = coerce_field("include_confidences", include_confidences)
+
+    deadline_ms = data.get("deadline_ms")
+    if deadline_ms is not None and not (type(deadline_ms) in (int, float) and deadline_ms > 0):
+        deadline_ms = coerce_field("deadline_ms", deadline_ms)
+
+    return {
+        "titles": titles,
+        "response_format": response_format,
+        "include_confidences": include_confidences,
+        "deadline_ms": deadline_ms,
+    }
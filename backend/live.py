@@ -0,0 +1,168 @@
+import asyncio
+
+from backend import fastjson
+from backend.admission import Overloaded
+from backend.sessions import Session
+
+
+class PendingDelta:
+    """
+    Tab events received on one socket but not yet classified
+
+    Events are merged as they arrive (a later add of the same tab id
+    replaces the earlier title, a remove cancels a pending add), so what
+    is waiting is bounded by the number of distinct tabs rather than the
+    number of events.
+    """
+
+    def __init__(self):
+        self.added = {}
+        self.removed = set()
+        self.ready = asyncio.Event()
+        self.drained = asyncio.Event()
+
+    def __len__(self):
+        return len(self.added) + len(self.removed)
+
+    def merge(self, added, removed):
+        for tab_id in removed:
+            self.added.pop(tab_id, None)
+            self.removed.add(tab_id)
+        self.added.update(added)
+        if self:
+            self.ready.set()
+
+    def take(self):
+        added, removed = self.added, list(self.removed)
+        self.added, self.removed = {}, set()
+        self.ready.clear()
+        self.drained.set()
+        return added, removed
+
+
+class LiveHub:
+    """
+    Serves the live classification WebSocket
+
+    Each connection keeps its own Session of tab assignments. A reader task
+    merges incoming events into a PendingDelta while a writer task
+    classifies whatever is pending through update() (the shared
+    micro-batcher) and pushes back only the assignments that changed.
+
+    Backpressure works in both directions: the reader stops reading once
+    max_pending tabs are waiting, so TCP flow control slows the client
+    down, and a client that doesn't read its replies within send_timeout
+    is disconnected. Past max_connections new sockets are refused.
+    """
+
+    def __init__(self, update, parse, max_connections=1000, max_pending=1000, send_timeout=5.0):
+        self.update = update
+        self.parse = parse
+        self.max_connections = max_connections
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+
+        self.connections = 0
+        self.accepted = 0
+        self.refused = 0
+        self.events = 0
+        self.deltas_sent = 0
+        self.throttled = 0
+        self.shed = 0
+        self.slow_disconnects = 0
+
+    async def serve(self, websocket, client=None):
+        if self.connections >= self.max_connections:
+            self.refused += 1
+            # 1013 "try again later" only reaches the client on an open
+            # socket; closing before accept() is an HTTP 403 handshake reject
+            await websocket.accept()
+            await websocket.close(code=1013)
+            return
+
+        self.connections += 1
+        self.accepted += 1
+        try:
+            await websocket.accept()
+            pending = PendingDelta()
+            send_lock = asyncio.Lock()
+            tasks = {
+                asyncio.create_task(self._read(websocket, pending, send_lock)),
+                asyncio.create_task(self._write(websocket, Session(None), pending, send_lock, client)),
+            }
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                # Whichever side ended (disconnect, failed send), stop the other
+                for task in tasks:
+                    task.cancel()
+            for task in done:
+                # A failed send just means the socket is gone
+                if not task.cancelled():
+                    task.exception()
+        finally:
+            self.connections -= 1
+
+    async def _send(self, websocket, send_lock, message):
+        async with send_lock:
+            await websocket.send_text(fastjson.dumps(message).decode("utf-8"))
+
+    async def _read(self, websocket, pending, send_lock):
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                added, removed = self.parse(message.get("text") or message.get("bytes") or b"")
+            except ValueError as e:
+                await self._send(websocket, send_lock, {"error": str(e)})
+                continue
+
+            self.events += 1
+            pending.merge(added, removed)
+            if len(pending) >= self.max_pending:
+                # Stop reading until the writer catches up
+                self.throttled += 1
+                while len(pending) >= self.max_pending:
+                    pending.drained.clear()
+                    await pending.drained.wait()
+
+    async def _write(self, websocket, session, pending, send_lock, client):
+        while True:
+            await pending.ready.wait()
+            added, removed = pending.take()
+            while True:
+                try:
+                    result = await self.update(session, added, removed, client)
+                    break
+                except Overloaded as e:
+                    # Hold on to the events and retry; new ones keep merging
+                    self.shed += 1
+                    await asyncio.sleep(e.retry_after)
+                except fastjson.PayloadError as e:
+                    result = {"error": str(e)}
+                    break
+
+            if not result.get("changed") and not result.get("removed") and "error" not in result:
+                continue
+            try:
+                await asyncio.wait_for(self._send(websocket, send_lock, result), self.send_timeout)
+            except asyncio.TimeoutError:
+                self.slow_disconnects += 1
+                # 1008: policy violation, the client stopped reading
+                await websocket.close(code=1008)
+                return
+            self.deltas_sent += 1
+
+    def snapshot(self):
+        return {
+            "connections": self.connections,
+            "max_connections": self.max_connections,
+            "accepted": self.accepted,
+            "refused": self.refused,
+            "events": self.events,
+            "deltas_sent": self.deltas_sent,
+            "throttled": self.throttled,
+            "shed": self.shed,
+            "slow_disconnects": self.slow_disconnects,
+        }
@@ -1,12 +1,146 @@
 #main.py
-from fastapi import FastAPI
+import asyncio
+import os
+import secrets
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal
+
+from fastapi import FastAPI, Header, Request, WebSocket
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from ml.predict import predict_categories
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, StringConstraints, ValidationError
+from starlette.concurrency import run_in_threadpool
+from backend import fastjson, msgpack_codec
+from backend.admission import AdmissionController, Overloaded
+from backend.batching import MicroBatcher
+from backend.compression import CompressionMiddleware
+from backend.coalescing import ResponseCache, SingleFlight, body_key, titles_key
+from backend.live import LiveHub
+from backend.other_log import OtherTitleSink
+from backend.sessions import SessionStore
+from backend.streaming import (
+    BodyStreamingResponse,
+    iter_json_array_titles,
+    iter_ndjson_titles,
+    stream_categories,
+)
+from ml import predict
+from ml.metrics import metrics
+from ml.predict import classify_titles, classify_titles_within, group_indices, group_titles
+from ml.registry import WARMUP_TITLES
+
+# Cross-request batching window: a batch closes after this many ms or titles
+BATCH_WINDOW_MS = float(os.getenv("TIDYTABS_BATCH_WINDOW_MS", "3"))
+BATCH_MAX_TITLES = int(os.getenv("TIDYTABS_BATCH_MAX_TITLES", "512"))
+
+# Sampled, rotating JSONL log of titles that land in "Other"
+OTHER_LOG_PATH = os.getenv("TIDYTABS_OTHER_LOG", "logs/other_titles.jsonl")
+OTHER_SAMPLE_RATE = float(os.getenv("TIDYTABS_OTHER_SAMPLE_RATE", "1.0"))
+
+# Titles classified per chunk by the streaming endpoint
+STREAM_CHUNK_SIZE = int(os.getenv("TIDYTABS_STREAM_CHUNK_SIZE", "256"))
+
+# Request size caps, enforced on both the pydantic and the fast JSON path
+MAX_TITLES = int(os.getenv("TIDYTABS_MAX_TITLES", "10000"))
+MAX_TITLE_LENGTH = int(os.getenv("TIDYTABS_MAX_TITLE_LENGTH", "1000"))
+# Decode/validate/encode categorize bodies without pydantic (uses orjson if installed)
+FAST_JSON = os.getenv("TIDYTABS_FAST_JSON", "1") == "1"
+
+# Titles classified per step (through every tier) when a request carries a deadline
+DEADLINE_CHUNK_SIZE = int(os.getenv("TIDYTABS_DEADLINE_CHUNK_SIZE", "64"))
+
+# Incremental /sessions API: idle sessions expire after this long, and at
+# most this many are kept (least recently used evicted first)
+SESSION_TTL_SECONDS = float(os.getenv("TIDYTABS_SESSION_TTL_SECONDS", "1800"))
+MAX_SESSIONS = int(os.getenv("TIDYTABS_MAX_SESSIONS", "1000"))
+# Approximate memory all sessions' tabs may take before the least recently
+# used sessions are evicted
+SESSION_MAX_BYTES = int(os.getenv("TIDYTABS_SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+# Set by backend.serve: sessions live in one process, so with several
+# workers a delta could land on one that never saw the session; each
+# worker also writes its own "Other" log file
+SERVE_WORKERS = int(os.getenv("TIDYTABS_SERVE_WORKERS", "1"))
+
+# Live WebSocket endpoint: sockets allowed at once, tabs that may wait per
+# socket before it stops being read, and how long a reply may take to send
+LIVE_MAX_CONNECTIONS = int(os.getenv("TIDYTABS_LIVE_MAX_CONNECTIONS", "1000"))
+LIVE_MAX_PENDING = int(os.getenv("TIDYTABS_LIVE_MAX_PENDING", "1000"))
+LIVE_SEND_TIMEOUT = float(os.getenv("TIDYTABS_LIVE_SEND_TIMEOUT", "5"))
+
+# Identical bodies repeated within this window get the cached response (0 disables)
+RESPONSE_CACHE_TTL_MS = float(os.getenv("TIDYTABS_RESPONSE_CACHE_TTL_MS", "2000"))
+# Total size of the response bodies kept for repeats
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("TIDYTABS_RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
 
-app = FastAPI()
+# Titles allowed to be queued for classification before new requests are shed
+MAX_QUEUED_TITLES = int(os.getenv("TIDYTABS_MAX_QUEUED_TITLES", "20000"))
+# Optional per-client token buckets, keyed on this request header
+CLIENT_HEADER = os.getenv("TIDYTABS_CLIENT_HEADER")
+CLIENT_TITLES_PER_SECOND = float(os.getenv("TIDYTABS_CLIENT_TITLES_PER_SECOND", "0"))
+CLIENT_BURST_TITLES = int(os.getenv("TIDYTABS_CLIENT_BURST_TITLES", "10000"))
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("TIDYTABS_COMPRESS_MIN_BYTES", "1024"))
+# Cap on a decompressed gzip/zstd request body
+MAX_BODY_BYTES = int(os.getenv("TIDYTABS_MAX_BODY_BYTES", str(8 * 1024 * 1024)))
+
+# How often ml/sklearn is checked for new artifacts (0 disables watching)
+MODEL_WATCH_SECONDS = float(os.getenv("TIDYTABS_MODEL_WATCH_SECONDS", "30"))
+# Required as X-Admin-Token on admin endpoints, which are disabled without it
+ADMIN_TOKEN = os.getenv("TIDYTABS_ADMIN_TOKEN")
+
+async def watch_model_artifacts():
+    while True:
+        await asyncio.sleep(MODEL_WATCH_SECONDS)
+        await run_in_threadpool(predict.registry.reload_if_changed)
+
+# Set once the request path (batcher task, executor thread, cache) is warm
+path_warmup = {"done": False, "seconds": None}
+
+async def warm_up_request_path():
+    start = time.perf_counter()
+    await batcher.classify(WARMUP_TITLES)
+    path_warmup["seconds"] = time.perf_counter() - start
+    path_warmup["done"] = True
+
+async def start_up():
+    # Runs after the server is accepting connections, so "/" answers while
+    # numpy/scipy are imported and the model is loaded; /ready waits for it
+    await run_in_threadpool(predict.load_model)
+    await warm_up_request_path()
+    if MODEL_WATCH_SECONDS > 0:
+        await watch_model_artifacts()
+
+@asynccontextmanager
+async def lifespan(app):
+    startup = asyncio.create_task(start_up())
+    yield
+    startup.cancel()
+
+app = FastAPI(lifespan=lifespan)
+batcher = MicroBatcher(classify_titles, BATCH_WINDOW_MS, BATCH_MAX_TITLES)
+other_titles = OtherTitleSink(OTHER_LOG_PATH, OTHER_SAMPLE_RATE, per_process=SERVE_WORKERS > 1)
+single_flight = SingleFlight()
+response_cache = ResponseCache(RESPONSE_CACHE_TTL_MS / 1000, max_bytes=RESPONSE_CACHE_MAX_BYTES)
+sessions = SessionStore(SESSION_TTL_SECONDS, MAX_SESSIONS, SESSION_MAX_BYTES)
+admission = AdmissionController(
+    MAX_QUEUED_TITLES,
+    client_rate=CLIENT_TITLES_PER_SECOND if CLIENT_HEADER else 0,
+    client_burst=CLIENT_BURST_TITLES,
+)
+metrics.register_gauges("tidytabs_batching", batcher.stats.snapshot)
+metrics.register_gauges("tidytabs_other_log", other_titles.snapshot)
 
+def coalescing_stats():
+    return {**single_flight.snapshot(), **response_cache.snapshot()}
+
+metrics.register_gauges("tidytabs_coalescing", coalescing_stats)
+metrics.register_gauges("tidytabs_admission", admission.snapshot)
+metrics.register_gauges("tidytabs_sessions", sessions.snapshot)
+
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES, max_body_bytes=MAX_BODY_BYTES)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -14,29 +148,388 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+Title = Annotated[str, StringConstraints(max_length=MAX_TITLE_LENGTH)]
+
 class TabData(BaseModel):
-    titles: list[str]
+    titles: list[Title] = Field(max_length=MAX_TITLES)
+    # "indices" returns input positions per category instead of echoing titles
+    response_format: Literal["titles", "indices"] = "titles"
+    include_confidences: bool = False
+    # Budget in ms from receipt; titles not reached in time come back unclassified
+    deadline_ms: float | None = Field(default=None, gt=0)
+
+class SessionTab(BaseModel):
+    id: int | str
+    title: Title
+
+class SessionDelta(BaseModel):
+    # A bare string is both the tab's id and its title; re-adding an id
+    # with a new title updates that tab
+    add: list[SessionTab | Title] = Field(default=[], max_length=MAX_TITLES)
+    remove: list[int | str] = Field(default=[], max_length=MAX_TITLES)
+
+# The body is parsed inside the handler so parsing can be timed; keep it documented
+TAB_DATA_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": TabData.model_json_schema()}},
+    }
+}
+
+def client_id(request):
+    return request.headers.get(CLIENT_HEADER) if CLIENT_HEADER else None
+
+def request_deadline_ms(request, data):
+    """Tighter of the X-Deadline-Ms header and the body's deadline_ms, or None"""
+    header = request.headers.get("x-deadline-ms")
+    if header is None:
+        return data.deadline_ms
+    try:
+        deadline_ms = float(header)
+    except ValueError:
+        deadline_ms = 0
+    if not deadline_ms > 0:
+        raise fastjson.PayloadError(
+            "X-Deadline-Ms must be a positive number", ("header", "x-deadline-ms"), "greater_than"
+        )
+    return min(deadline_ms, data.deadline_ms or deadline_ms)
+
+def shed(e):
+    metrics.increment("tidytabs_shed_total")
+    return JSONResponse(status_code=e.status_code, content={"error": e.reason}, headers=e.headers())
 
 @app.get("/")
 @app.head("/")
 def root():
     return {"status": "TidyTabs local backend is live"}
 
-@app.post("/categorize_local")
-def categorize_local(data: TabData):
+@app.get("/ready")
+def ready():
+    # Liveness is "/"; this only passes once a model is loaded and warm
+    active = predict.registry.active
+    if active is None or not path_warmup["done"]:
+        return JSONResponse(status_code=503, content={
+            "ready": False,
+            "warmed_up": path_warmup["done"],
+            "error": predict.registry.last_error,
+        })
+    return {
+        "ready": True,
+        "model_version": active.version,
+        "model_source": active.source,
+        "model_warmup_ms": active.warmup_seconds * 1000,
+        "path_warmup_ms": path_warmup["seconds"] * 1000,
+    }
+
+@app.get("/batching_stats")
+def batching_stats():
+    return batcher.stats.snapshot()
+
+@app.get("/admission_stats")
+def admission_stats():
+    return admission.snapshot()
+
+@app.get("/cache_stats")
+def cache_stats():
+    return predict.prediction_cache.snapshot()
+
+@app.get("/rule_stats")
+def rule_stats():
+    return predict.rule_stats.snapshot()
+
+@app.get("/model")
+def model_info():
+    active = predict.registry.active
+    if active is None:
+        return JSONResponse(status_code=503, content={"error": predict.registry.last_error})
+    return active.describe()
+
+@app.post("/admin/reload_model")
+async def reload_model(x_admin_token: str | None = Header(default=None)):
+    # Disabled unless a token is configured: the service is public
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=404, content={"error": "Admin endpoints are disabled"})
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        return JSONResponse(status_code=403, content={"error": "Invalid admin token"})
+    try:
+        loaded = await run_in_threadpool(predict.registry.load)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+    return loaded.describe()
+
+@app.get("/other_titles")
+def top_other_titles():
+    return {"top": [{"title": t, "count": n} for t, n in other_titles.top()]}
+
+@app.get("/metrics")
+def metrics_text():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.post("/categorize_local", openapi_extra=TAB_DATA_BODY)
+async def categorize_local(request: Request):
+    started = time.perf_counter()
+    received = time.monotonic()
+    body = await request.body()
+
+    # application/msgpack in and/or out, chosen by Content-Type and Accept
+    msgpack_request = msgpack_codec.is_msgpack(request.headers.get("content-type", ""))
+    msgpack_response = msgpack_codec.prefers_msgpack(request.headers.get("accept", ""), msgpack_request)
+    if (msgpack_request or msgpack_response) and not msgpack_codec.available():
+        status_code = 415 if msgpack_request else 406
+        return JSONResponse(status_code=status_code, content={"error": "msgpack is not installed on this server"})
+    media_type = msgpack_codec.MEDIA_TYPE if msgpack_response else "application/json"
+
+    # Immediate repeats of the same body (double clicks, several popups)
+    active = predict.registry.active
+    cache_key = body_key(body, active.version if active is not None else None, media_type)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        metrics.increment("tidytabs_requests_total")
+        return Response(cached, media_type=media_type)
+
     try:
-        result = predict_categories(data.titles)
+        with metrics.timer("parse"):
+            if msgpack_request:
+                data = TabData.model_construct(**fastjson.validate_tab_payload(
+                    msgpack_codec.unpack(body), MAX_TITLES, MAX_TITLE_LENGTH
+                ))
+            elif FAST_JSON:
+                data = TabData.model_construct(
+                    **fastjson.parse_tab_payload(body, MAX_TITLES, MAX_TITLE_LENGTH)
+                )
+            else:
+                data = TabData.model_validate_json(body)
+        deadline_ms = request_deadline_ms(request, data)
+    except fastjson.PayloadError as e:
+        metrics.increment("tidytabs_invalid_requests_total")
+        return JSONResponse(status_code=422, content={"detail": e.errors()})
+    except ValidationError as e:
+        metrics.increment("tidytabs_invalid_requests_total")
+        return JSONResponse(status_code=422, content={"detail": jsonable_encoder(e.errors())})
 
-        # Log which titles went to "Other"
+    metrics.increment("tidytabs_requests_total")
+    metrics.increment("tidytabs_titles_total", len(data.titles))
+    try:
+        admission.admit(len(data.titles), client_id(request))
+    except Overloaded as e:
+        return shed(e)
+
+    try:
+        if not data.titles:
+            if msgpack_response:
+                return Response(msgpack_codec.pack({"categories": {"Other": []}}), media_type=media_type)
+            return {"categories": {"Other": []}}
+
+        with metrics.timer("classify"):
+            if deadline_ms is None:
+                # Concurrent requests for the same titles share one classification
+                labels, confidences = await single_flight.run(
+                    titles_key(data.titles), lambda: batcher.classify(data.titles)
+                )
+            else:
+                # Scored on its own so the chunks can stop at this request's deadline
+                labels, confidences = await run_in_threadpool(
+                    classify_titles_within, data.titles, received + deadline_ms / 1000, DEADLINE_CHUNK_SIZE
+                )
+
+        with metrics.timer("group"):
+            # msgpack callers always get the index-oriented shape
+            if data.response_format == "indices" or msgpack_response:
+                result = group_indices(labels)
+            else:
+                result = group_titles(data.titles, labels)
+            unclassified = result.pop(None, None)
+
+        # Log which titles went to "Other" (sampled, off the request path)
         if "Other" in result:
-            print("\n=== Tabs categorized as 'Other' ===")
-            for title in result["Other"]:
-                print(f"- {title}")
-            print("=== End of 'Other' ===\n")
-        
+            other_titles.offer([t for t, label in zip(data.titles, labels) if label == "Other"])
 
-        return {"categories": result}
+        response = {"categories": result}
+        if unclassified is not None:
+            metrics.increment("tidytabs_partial_responses_total")
+            response["partial"] = True
+            response["unclassified"] = unclassified
+        if data.include_confidences:
+            response["confidences"] = [None if c is None else round(c, 4) for c in confidences]
+
+        with metrics.timer("serialize"):
+            if msgpack_response:
+                response = Response(msgpack_codec.pack(response), media_type=media_type)
+            elif FAST_JSON:
+                response = Response(fastjson.dumps(response), media_type="application/json")
+            else:
+                response = JSONResponse(response)
+        if unclassified is None:
+            response_cache.put(cache_key, response.body)
+        metrics.observe("tidytabs_stage_seconds", time.perf_counter() - started, stage="request")
+        return response
     except Exception as e:
+        metrics.increment("tidytabs_errors_total")
         return JSONResponse(status_code=500, content={"error": str(e)})
+    finally:
+        admission.release(len(data.titles))
+
+def session_categories(assignments):
+    """Group tab ids by label"""
+    grouped = {}
+    for tab_id, label in assignments:
+        if label not in grouped:
+            grouped[label] = []
+        grouped[label].append(tab_id)
+    return grouped
+
+def delta_tabs(delta):
+    """SessionDelta.add as a tab id -> title dict"""
+    added = {}
+    for tab in delta.add:
+        tab_id, title = (tab, tab) if isinstance(tab, str) else (tab.id, tab.title)
+        added[tab_id] = title
+    return added
+
+async def update_session(session, added, removed, client):
+    """
+    Remove then (re)classify tabs, returning only the assignments that changed
+
+    Raises:
+        fastjson.PayloadError: if the session would outgrow MAX_TITLES
+        Overloaded: if admission control sheds the work
+    """
+    active = predict.registry.active
+    version = active.version if active is not None else None
+
+    removed = set(removed)
+    remaining = {tab_id for tab_id in session.tabs if tab_id not in removed}
+    if len(remaining | added.keys()) > MAX_TITLES:
+        raise fastjson.PayloadError(f"A session may hold at most {MAX_TITLES} tabs", ("add",), "too_long")
+
+    if session.model_version is not None and session.model_version != version:
+        # The model changed since the last delta: re-score every kept tab
+        # so the client hears about any assignment that moved
+        pending = {tab_id: session.tabs[tab_id][0] for tab_id in remaining}
+        pending.update(added)
+    else:
+        # Tabs re-sent with an unchanged title need no work
+        pending = {
+            tab_id: title for tab_id, title in added.items()
+            if tab_id in removed or session.tabs.get(tab_id, (None,))[0] != title
+        }
+
+    admission.admit(len(pending), client)
+    try:
+        labels, confidences = await batcher.classify(list(pending.values()))
+    finally:
+        admission.release(len(pending))
+
+    metrics.increment("tidytabs_session_titles_total", len(pending))
+    changed, gone = session.apply(
+        removed,
+        [(tab_id, title, label, confidence)
+         for (tab_id, title), label, confidence in zip(pending.items(), labels, confidences)],
+        version,
+    )
+    sessions.charge(session)
+    if "Other" in labels:
+        other_titles.offer([title for title, label in zip(pending.values(), labels) if label == "Other"])
+
+    return {
+        "changed": session_categories(changed.items()),
+        "removed": gone,
+        "size": len(session.tabs),
+    }
+
+async def apply_session_delta(request, session, delta):
+    try:
+        result = await update_session(session, delta_tabs(delta), delta.remove, client_id(request))
+    except fastjson.PayloadError as e:
+        return JSONResponse(status_code=422, content={"detail": e.errors()})
+    except Overloaded as e:
+        return shed(e)
+    return {"session_id": session.id, **result}
+
+def parse_live_event(data):
+    delta = SessionDelta.model_validate_json(data)
+    return delta_tabs(delta), delta.remove
+
+live = LiveHub(update_session, parse_live_event, LIVE_MAX_CONNECTIONS, LIVE_MAX_PENDING, LIVE_SEND_TIMEOUT)
+metrics.register_gauges("tidytabs_live", live.snapshot)
+
+@app.websocket("/live")
+async def live_classify(websocket: WebSocket):
+    # Same {"add", "remove"} events as /sessions; each reply holds only the
+    # assignments that changed
+    await live.serve(websocket, client_id(websocket))
+
+def sessions_unavailable():
+    # Refused outright rather than answering 404 on whichever worker didn't
+    # create the session; /live keeps its state on the connection instead
+    return JSONResponse(status_code=501, content={
+        "error": "Sessions need a single worker process; use /live with several workers",
+    })
+
+@app.post("/sessions")
+async def create_session(request: Request, delta: SessionDelta | None = None):
+    # Register a session, optionally seeding it with the current tabs
+    if SERVE_WORKERS > 1:
+        return sessions_unavailable()
+    session = sessions.create()
+    return await apply_session_delta(request, session, delta or SessionDelta())
+
+@app.post("/sessions/{session_id}/delta")
+async def session_delta(session_id: str, request: Request, delta: SessionDelta):
+    # Only the tabs added or removed since the last call; replies with the
+    # assignments that changed
+    if SERVE_WORKERS > 1:
+        return sessions_unavailable()
+    session = sessions.get(session_id)
+    if session is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired session"})
+    return await apply_session_delta(request, session, delta)
+
+@app.get("/sessions/{session_id}")
+async def session_state(session_id: str):
+    # Full current assignments, for a client that lost track of them
+    if SERVE_WORKERS > 1:
+        return sessions_unavailable()
+    session = sessions.get(session_id)
+    if session is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired session"})
+    return {
+        "session_id": session.id,
+        "categories": session_categories((tab_id, label) for tab_id, (_, label, _) in session.tabs.items()),
+        "size": len(session.tabs),
+    }
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    if SERVE_WORKERS > 1:
+        return sessions_unavailable()
+    if not sessions.delete(session_id):
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired session"})
+    return {"deleted": session_id}
+
+@app.post("/categorize_stream")
+async def categorize_stream(request: Request):
+    # Accepts a JSON array or NDJSON body; results stream back per chunk
+    metrics.increment("tidytabs_stream_requests_total")
+    client = client_id(request)
+    # The stream's size is unknown up front: shed it only if already over
+    # budget, then count each chunk (and charge the client) as it's classified
+    try:
+        admission.admit(0, client)
+    except Overloaded as e:
+        return shed(e)
+
+    def classify_chunk(chunk):
+        with admission.track(len(chunk), client):
+            return classify_titles(chunk)
 
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type:
+        titles = iter_ndjson_titles(request.stream())
+    else:
+        titles = iter_json_array_titles(request.stream())
 
+    return BodyStreamingResponse(
+        stream_categories(titles, classify_chunk, STREAM_CHUNK_SIZE),
+        media_type="application/x-ndjson",
+    )
@@ -0,0 +1,63 @@
+from backend.fastjson import PayloadError
+
+# msgpack is optional; without it msgpack requests get a 415 and msgpack
+# responses a 406
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MEDIA_TYPE = "application/msgpack"
+MEDIA_TYPES = (MEDIA_TYPE, "application/x-msgpack")
+
+
+def available():
+    return msgpack is not None
+
+
+def is_msgpack(content_type):
+    return content_type.split(";")[0].strip().lower() in MEDIA_TYPES
+
+
+def media_quality(accept, media_types):
+    """Highest q the Accept header gives any of media_types, 0.0 if none"""
+    best = 0.0
+    for part in accept.split(","):
+        media_type, *params = part.split(";")
+        if media_type.strip().lower() not in media_types:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        best = max(best, q)
+    return best
+
+
+def prefers_msgpack(accept, request_is_msgpack=False):
+    """
+    Whether to answer in msgpack
+
+    An explicit Accept decides, with JSON winning ties; with no Accept (or
+    only */*) the reply mirrors the request's encoding.
+    """
+    if accept.strip() in ("", "*/*"):
+        return request_is_msgpack
+    msgpack_q = media_quality(accept, MEDIA_TYPES)
+    return msgpack_q > 0 and msgpack_q > media_quality(accept, ("application/json",))
+
+
+def unpack(body):
+    try:
+        return msgpack.unpackb(body)
+    except (ValueError, msgpack.UnpackException) as e:
+        raise PayloadError(f"Invalid msgpack: {str(e) or type(e).__name__}", error_type="msgpack_invalid")
+
+
+def pack(obj):
+    # float32 keeps well over the 4 decimal places confidences are rounded to
+    return msgpack.packb(obj, use_single_float=True)
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from ml.cache import normalize_title
+
+
+class CountMinSketch:
+    """Fixed-memory frequency estimates; never under-counts, may over-count"""
+
+    def __init__(self, width=4096, depth=4):
+        import numpy as np
+
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key):
+        """Count key once and return its new estimated frequency"""
+        columns = self._columns(key)
+        self.table[self._rows, columns] += 1
+        return int(self.table[self._rows, columns].min())
+
+
+class OtherTitleSink:
+    """
+    Off-request-path log of titles that landed in "Other"
+
+    offer() only samples and appends to a bounded deque, dropping when
+    full, so the request path never blocks. A background task drains the
+    deque, tracks frequencies in a count-min sketch, writes each title's
+    first sighting to a rotating JSONL file and periodically writes the
+    top-N recurring titles. deque appends and pops are thread-safe, so the
+    drain can run in the executor while requests keep offering.
+
+    RotatingFileHandler assumes it is the file's only writer. With
+    per_process, each process writes its own file with its pid before the
+    extension (other_titles.<pid>.jsonl), opened on first write so a
+    pre-forked worker uses its own pid rather than the parent's.
+    """
+
+    def __init__(self, path, sample_rate=1.0, queue_size=10000, top_n=20,
+                 drain_interval=1.0, summary_interval=60.0,
+                 max_bytes=10 * 1024 * 1024, backup_count=3, per_process=False):
+        self.path = path
+        self.per_process = per_process
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.drain_interval = drain_interval
+        self.summary_interval = summary_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self.queue = deque()
+        self.queue_size = queue_size
+        # Created on first drain, off the startup path
+        self.sketch = None
+        self.heavy_hitters = {}
+        self.offered = 0
+        self.dropped = 0
+        self.written = 0
+        self._unsummarized = 0
+        self._logger = None
+        self._worker = None
+
+    def offer(self, titles):
+        """Queue a sample of titles; call from the event loop"""
+        for title in titles:
+            self.offered += 1
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                continue
+            if len(self.queue) >= self.queue_size:
+                self.dropped += 1
+                continue
+            self.queue.append(title)
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def top(self):
+        """Most frequent "Other" titles seen so far as (title, count) pairs"""
+        # list() copies in one step, safe against the drain thread mutating it
+        ranked = sorted(list(self.heavy_hitters.items()), key=lambda item: item[1][1], reverse=True)
+        return [(title, count) for _, (title, count) in ranked[: self.top_n]]
+
+    def snapshot(self):
+        return {
+            "queue_depth": len(self.queue),
+            "offered": self.offered,
+            "dropped": self.dropped,
+            "written": self.written,
+        }
+
+    def _drain(self):
+        """Turn queued titles into JSONL records, updating the sketch"""
+        if self.sketch is None:
+            self.sketch = CountMinSketch()
+        records = []
+        now = time.time()
+        while self.queue:
+            title = self.queue.popleft()
+            key = normalize_title(title)
+            count = self.sketch.add(key)
+            self._track(key, title, count)
+            if count == 1:
+                records.append({"ts": now, "title": title})
+        return records
+
+    def _track(self, key, title, count):
+        self.heavy_hitters[key] = (title, count)
+        if len(self.heavy_hitters) > 4 * self.top_n:
+            # Keep a small candidate set; anything evicted can come back
+            # later because the sketch still remembers its count
+            smallest = min(self.heavy_hitters, key=lambda k: self.heavy_hitters[k][1])
+            del self.heavy_hitters[smallest]
+
+    def log_path(self):
+        if not self.per_process:
+            return self.path
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{os.getpid()}{ext}"
+
+    def _write(self, records):
+        if self._logger is None:
+            path = self.log_path()
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger("tidytabs.other_titles")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.addHandler(handler)
+        for record in records:
+            self._logger.info(json.dumps(record))
+        self.written += len(records)
+
+    def _flush(self, summarize):
+        drained = len(self.queue)
+        records = self._drain()
+        self._unsummarized += drained
+        if summarize and self._unsummarized:
+            self._unsummarized = 0
+            records.append({"ts": time.time(), "top": self.top()})
+        if records:
+            try:
+                self._write(records)
+            except OSError:
+                self.dropped += len(records)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_summary = time.monotonic() + self.summary_interval
+        while True:
+            await asyncio.sleep(self.drain_interval)
+            summarize = time.monotonic() >= next_summary
+            if summarize:
+                next_summary = time.monotonic() + self.summary_interval
+            # Sketch updates and file I/O both run off the event loop
+            await loop.run_in_executor(None, self._flush, summarize)
@@ -0,0 +1,102 @@
+#serve.py
+"""
+Pre-fork server: load the model once, then fork uvicorn workers
+
+Every worker inherits the parent's already-loaded model and listening
+socket, so weights are shared copy-on-write (or, with the memory-mapped
+bundle, through the page cache) instead of being loaded once per worker.
+
+    python -m backend.serve --workers 4 --port 10000
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+
+def bind_socket(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, log_level):
+    # Restore default handlers so uvicorn installs its own graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(app, sock, log_level):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, sock, log_level)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve TidyTabs with pre-forked workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "10000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("TIDYTABS_WORKERS", "2")))
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    # Read by backend.main at import: per-process state such as /sessions
+    # is refused when requests can land on any of several workers
+    os.environ["TIDYTABS_SERVE_WORKERS"] = str(args.workers)
+
+    # Load the model and take first-call allocations in the parent
+    from backend.main import app
+    from ml.predict import classify_titles, load_model
+    load_model()
+    classify_titles(["New Tab"])
+
+    # Move everything allocated so far out of the GC's reach so collections
+    # in the workers don't write to (and un-share) the inherited pages
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers = {spawn(app, sock, args.log_level) for _ in range(args.workers)}
+    print(f"Serving on {args.host}:{args.port} with {args.workers} workers (parent {os.getpid()})")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            # Replace a crashed worker, backing off so a crash loop can't spin
+            time.sleep(0.5)
+            workers.add(spawn(app, sock, args.log_level))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import secrets
+import time
+from collections import OrderedDict
+
+# Rough per-tab cost beyond the title: dict slot, tuple, id, confidence
+TAB_OVERHEAD_BYTES = 200
+
+
+def tab_bytes(title):
+    return len(title) + TAB_OVERHEAD_BYTES
+
+
+class Session:
+    """One client's tabs and their current assignments"""
+
+    def __init__(self, session_id):
+        self.id = session_id
+        # tab id -> (title, label, confidence)
+        self.tabs = {}
+        self.model_version = None
+        self.last_used = time.monotonic()
+        # Approximate memory held by tabs, and how much of it the store has
+        # counted against its budget
+        self.bytes = 0
+        self.charged = 0
+
+    def apply(self, removed, assigned, model_version):
+        """
+        Drop removed tab ids, then store (tab_id, title, label, confidence)
+        assignments
+
+        Returns:
+            (changed, removed) where changed maps tab id -> label for tabs
+            that are new or whose label differs from before, and removed
+            lists the ids that were actually present
+        """
+        gone = []
+        for tab_id in removed:
+            previous = self.tabs.pop(tab_id, None)
+            if previous is not None:
+                gone.append(tab_id)
+                self.bytes -= tab_bytes(previous[0])
+        changed = {}
+        for tab_id, title, label, confidence in assigned:
+            previous = self.tabs.get(tab_id)
+            if previous is None or previous[1] != label:
+                changed[tab_id] = label
+            if previous is not None:
+                self.bytes -= tab_bytes(previous[0])
+            self.tabs[tab_id] = (title, label, confidence)
+            self.bytes += tab_bytes(title)
+        self.model_version = model_version
+        return changed, gone
+
+
+class SessionStore:
+    """
+    Bounded, TTL-evicted map of session id -> Session
+
+    Sessions are kept in least recently used order, so expired ones are
+    always at the front and are dropped lazily whenever the store is
+    touched. Past max_sessions, or once the tabs of all sessions take more
+    than max_bytes, the least recently used sessions are evicted; their
+    clients get a 404 and simply register again. Only used from the event
+    loop, so it needs no lock.
+    """
+
+    def __init__(self, ttl_seconds=1800.0, max_sessions=1000, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self._sessions = OrderedDict()
+
+    def _pop_oldest(self):
+        _, session = self._sessions.popitem(last=False)
+        self.bytes -= session.charged
+        session.charged = 0
+
+    def _expire(self, now):
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used <= self.ttl:
+                break
+            self._pop_oldest()
+            self.expired += 1
+
+    def create(self):
+        now = time.monotonic()
+        self._expire(now)
+        session = Session(secrets.token_urlsafe(16))
+        self._sessions[session.id] = session
+        self.created += 1
+        while len(self._sessions) > self.max_sessions:
+            self._pop_oldest()
+            self.evicted += 1
+        return session
+
+    def charge(self, session):
+        """
+        Count a session's current size against max_bytes after it changed
+
+        Evicts least recently used sessions other than this one until the
+        store fits. A session that was evicted or deleted meanwhile isn't
+        stored any more and is left alone.
+        """
+        if self._sessions.get(session.id) is not session:
+            return
+        self.bytes += session.bytes - session.charged
+        session.charged = session.bytes
+        self._sessions.move_to_end(session.id)
+        while self.bytes > self.max_bytes and len(self._sessions) > 1:
+            self._pop_oldest()
+            self.evicted += 1
+
+    def get(self, session_id):
+        """The live session for session_id, refreshing its TTL, or None"""
+        now = time.monotonic()
+        self._expire(now)
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = now
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.bytes -= session.charged
+        session.charged = 0
+        return True
+
+    def snapshot(self):
+        return {
+            "active": len(self._sessions),
+            "bytes": self.bytes,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,128 @@
+import codecs
+import json
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+# Largest amount of undecoded body kept while waiting for one element to complete
+MAX_PENDING_CHARS = 64 * 1024
+
+WHITESPACE = " \t\r\n"
+
+
+async def iter_ndjson_titles(chunks):
+    """Yield titles from an NDJSON body: one JSON string or {"title": ...} per line"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if line.strip():
+                yield parse_title(json.loads(line))
+        if len(pending) > MAX_PENDING_CHARS:
+            raise ValueError("NDJSON line too long")
+
+    pending += decoder.decode(b"", final=True)
+    if pending.strip():
+        yield parse_title(json.loads(pending))
+
+
+async def iter_json_array_titles(chunks):
+    """Yield titles from a JSON array body without holding the whole array"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    json_decoder = json.JSONDecoder()
+    pending = ""
+    started = finished = False
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        pos = 0
+        while not finished:
+            while pos < len(pending) and pending[pos] in WHITESPACE:
+                pos += 1
+            if pos == len(pending):
+                break
+            if not started:
+                if pending[pos] != "[":
+                    raise ValueError("Expected a JSON array of titles")
+                started = True
+                pos += 1
+            elif pending[pos] == "]":
+                finished = True
+                pos += 1
+            elif pending[pos] == ",":
+                pos += 1
+            else:
+                try:
+                    value, pos = json_decoder.raw_decode(pending, pos)
+                except json.JSONDecodeError:
+                    # Element split across chunks; wait for more body
+                    break
+                yield parse_title(value)
+        pending = pending[pos:]
+        if len(pending) > MAX_PENDING_CHARS:
+            raise ValueError("JSON array element too long")
+
+    if not finished:
+        raise ValueError("Truncated JSON array")
+
+
+def parse_title(value):
+    if isinstance(value, dict):
+        value = value.get("title")
+    if not isinstance(value, str):
+        raise ValueError("Each element must be a title string")
+    return value
+
+
+async def stream_categories(titles, classify, chunk_size):
+    """
+    Classify an async stream of titles in fixed-size chunks
+
+    Yields one NDJSON line per title ({"index", "category", "confidence"}),
+    written after each chunk so memory stays bounded by chunk_size. Errors
+    after the response has started are reported as a final {"error"} line.
+    """
+    index = 0
+    chunk = []
+    try:
+        async for title in titles:
+            chunk.append(title)
+            if len(chunk) == chunk_size:
+                yield await classify_chunk(chunk, index, classify)
+                index += len(chunk)
+                chunk = []
+        if chunk:
+            yield await classify_chunk(chunk, index, classify)
+    except Exception as e:
+        yield (json.dumps({"error": str(e)}) + "\n").encode("utf-8")
+
+
+async def classify_chunk(chunk, offset, classify):
+    labels, confidences = await run_in_threadpool(classify, chunk)
+
+    # Few distinct labels per chunk, so encode each one once
+    encoded = {}
+    lines = []
+    for i, (label, confidence) in enumerate(zip(labels, confidences)):
+        if label not in encoded:
+            encoded[label] = json.dumps(label)
+        lines.append(
+            f'{{"index": {offset + i}, "category": {encoded[label]}, "confidence": {round(confidence, 4)}}}\n'
+        )
+    return "".join(lines).encode("utf-8")
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose content iterator is still reading the request body
+
+    Starlette's disconnect listener calls receive() alongside the stream and
+    would swallow the remaining body messages, so here the body iterator owns
+    receive() and sees a disconnect itself (as ClientDisconnect).
+    """
+
+    async def listen_for_disconnect(self, receive):
+        await anyio.sleep_forever()
@@ -0,0 +1,49 @@
+import random
+import time
+
+from ml import predict
+from ml.cache import PredictionCache
+from ml.predict import predict_categories
+
+from benchmarks.bench_inference import load_titles
+
+
+def repeated_traffic(titles, requests, tabs_per_request, hot_fraction=0.8, hot_titles=200):
+    """Requests where most tabs come from a small set of popular titles"""
+    hot = random.sample(titles, hot_titles)
+    traffic = []
+    for _ in range(requests):
+        traffic.append([
+            random.choice(hot) if random.random() < hot_fraction else random.choice(titles)
+            for _ in range(tabs_per_request)
+        ])
+    return traffic
+
+
+def run(traffic):
+    start = time.perf_counter()
+    for titles in traffic:
+        predict_categories(titles)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    random.seed(42)
+    traffic = repeated_traffic(load_titles(), requests=500, tabs_per_request=30)
+
+    # Every cache miss reaches the model, not the exact-match table or rules
+    predict.registry.rules_path = None
+    predict.registry.exact_dir = None
+    predict.registry.load()
+
+    print("Cache size | Total (ms) | Hit rate")
+    print("-" * 36)
+    for size in (0, 100, 1000, 10000):
+        predict.prediction_cache = PredictionCache(size)
+        elapsed = run(traffic)
+        stats = predict.prediction_cache.snapshot()
+        print(f"{size:10d} | {elapsed:10.1f} | {stats['hit_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
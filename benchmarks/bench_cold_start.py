@@ -0,0 +1,106 @@
+"""
+Cold-start profile of the backend
+
+Import-time breakdown of `backend.main` (from `python -X importtime`) and
+wall-clock time from spawning uvicorn to the first 200 on `/` (liveness)
+and on `/ready` (model loaded and warm).
+
+    python -m benchmarks.bench_cold_start
+"""
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+HEAVY = ("numpy", "scipy", "sklearn", "joblib")
+
+
+def import_profile():
+    """Self time per top-level package and the total, in ms, plus heavy packages imported"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", "import backend.main"],
+        capture_output=True, text=True, check=True,
+    )
+    by_package = defaultdict(float)
+    total = 0.0
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == "backend.main":
+            total = int(cumulative_us) / 1000
+    return total, by_package, [p for p in HEAVY if p in by_package]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_status(port, path):
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+        connection.request("GET", path)
+        return connection.getresponse().status
+    except OSError:
+        return None
+
+
+def time_to_first_200(timeout=60):
+    """Seconds from spawning uvicorn until / and then /ready answer 200"""
+    port = free_port()
+    env = dict(os.environ, TIDYTABS_MODEL_WATCH_SECONDS="0")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-W", "ignore", "-m", "uvicorn", "backend.main:app",
+         "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        times = {}
+        for path in ("/", "/ready"):
+            while get_status(port, path) != 200:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"{path} never answered 200")
+                time.sleep(0.005)
+            times[path] = time.perf_counter() - start
+        return times
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+def main(runs=5):
+    totals = []
+    profiles = []
+    for _ in range(runs):
+        total, by_package, heavy = import_profile()
+        totals.append(total)
+        profiles.append(by_package)
+    by_package = {p: median([profile.get(p, 0.0) for profile in profiles]) for p in profiles[0]}
+
+    print(f"import backend.main: {median(totals):.0f} ms (median of {runs})")
+    print(f"Heavy packages imported: {', '.join(heavy) or 'none'}")
+    print("\nPackage              | Self import time (ms)")
+    print("-" * 44)
+    for package, ms in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:15]:
+        print(f"{package:20s} | {ms:21.1f}")
+
+    results = [time_to_first_200() for _ in range(runs)]
+    print(f"\nTime to first 200 (median of {runs}): "
+          f"/ {median([r['/'] for r in results]) * 1000:.0f} ms, "
+          f"/ready {median([r['/ready'] for r in results]) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import random
+import time
+
+from ml import predict
+from ml.cache import PredictionCache
+from ml.predict import predict_categories
+
+from benchmarks.bench_inference import load_titles
+
+# Titles that show up many times in one window
+DUPLICATE_HEAVY = ["New Tab", "Inbox (3) - Gmail", "Inbox (4) - Gmail", "YouTube", "Google Docs"]
+
+
+def duplicate_heavy_payload(titles, size, duplicate_fraction):
+    """A window where duplicate_fraction of the tabs repeat a few titles"""
+    return [
+        random.choice(DUPLICATE_HEAVY) if random.random() < duplicate_fraction else random.choice(titles)
+        for _ in range(size)
+    ]
+
+
+def best_of(payload, repeats=20):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict_categories(payload)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    random.seed(42)
+    titles = load_titles()
+
+    # Keep the cache, exact-match table and keyword rules out of the
+    # measurement, so every distinct title reaches the model
+    predict.prediction_cache = PredictionCache(0)
+    predict.registry.rules_path = None
+    predict.registry.exact_dir = None
+    predict.registry.load()
+
+    print("Tabs | Dup % | off (ms) | exact (ms) | normalized (ms)")
+    print("-" * 52)
+    for size in (50, 200, 1000):
+        for duplicate_fraction in (0.3, 0.7):
+            payload = duplicate_heavy_payload(titles, size, duplicate_fraction)
+            timings = {}
+            for mode in ("off", "exact", "normalized"):
+                predict.DEDUPE = mode
+                timings[mode] = best_of(payload)
+
+            # Exact dedupe must not change the grouped output
+            predict.DEDUPE = "off"
+            expected = predict_categories(payload)
+            predict.DEDUPE = "exact"
+            assert predict_categories(payload) == expected
+
+            print(f"{size:4d} | {duplicate_fraction:5.0%} | {timings['off']:8.2f} | "
+                  f"{timings['exact']:10.2f} | {timings['normalized']:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import random
+import sys
+import time
+
+from ml import predict
+from ml.cache import PredictionCache, normalize_title
+
+from benchmarks.bench_inference import load_titles
+
+
+def best_of(fn, repeats=10):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def load(exact):
+    """Reload the active model with or without the exact-match table (rules off)"""
+    predict.registry.rules_path = None
+    predict.registry.exact_dir = predict.EXACT_DIR if exact else None
+    return predict.registry.load()
+
+
+def main():
+    random.seed(42)
+    titles = load_titles()
+    # Variants that normalize to a training title but aren't in the data as-is
+    variants = [title.upper() for title in titles[:500]] + [f"(3) {title}" for title in titles[:500]]
+    predict.prediction_cache = PredictionCache(0)
+
+    load(exact=False)
+    model_labels, model_confidences = predict.classify_titles(titles + variants)
+    model = load(exact=True)
+    table = model.exact
+    labels, confidences = predict.classify_titles(titles + variants)
+
+    # Same labels; confidences only differ where another spelling of the
+    # title was stored, as with the prediction cache
+    assert labels == model_labels
+    drift = max(abs(a - b) for a, b in zip(confidences, model_confidences))
+    hits = sum(value is not None for value in table.lookup([normalize_title(t) for t in titles]))
+    print(f"Labels match the model on {len(labels)} titles (max confidence drift {drift:.2g})")
+    print(f"Table: {len(table)} titles in {table.hashes.nbytes + table.labels.nbytes + table.confidences.nbytes} bytes; "
+          f"hits {hits} of {len(titles)} training titles ({hits / len(titles):.1%})")
+
+    # What the same lookups cost with a dict of normalized titles
+    keys = [normalize_title(title) for title in titles]
+    mapping = {key: value for key, value in zip(keys, table.lookup(keys)) if value is not None}
+    dict_bytes = sys.getsizeof(mapping) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in mapping.items())
+    print(f"Same entries as a dict of strings: {dict_bytes} bytes")
+    print(f"Lookup of {len(keys)} keys: table {best_of(lambda: table.lookup(keys)) * 1000:.2f} ms, "
+          f"dict {best_of(lambda: [mapping.get(key) for key in keys]) * 1000:.2f} ms")
+
+    print("\nTitles | Model only (ms) | With table (ms) | Speedup")
+    print("-" * 53)
+    for size in (10, 100, 1000, len(titles)):
+        batch = random.sample(titles, size)
+        load(exact=False)
+        without = best_of(lambda: predict.classify_titles(batch))
+        load(exact=True)
+        with_table = best_of(lambda: predict.classify_titles(batch))
+        print(f"{size:6d} | {without * 1000:15.2f} | {with_table * 1000:15.2f} | {without / with_table:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
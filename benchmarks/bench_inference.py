@@ -0,0 +1,82 @@
+import json
+import os
+import random
+import time
+
+import joblib
+import numpy as np
+
+from ml import predict
+from ml.cache import PredictionCache
+from ml.predict import MODEL_DIR, predict_categories
+
+DATA_PATH = "ml/data/training_data_realistic.json"
+
+
+def load_titles(file_path=DATA_PATH):
+    """Load every title from the training data"""
+    with open(file_path) as f:
+        return [item["title"] for item in json.load(f)]
+
+
+# Original sklearn components for the reference path
+model = joblib.load(os.path.join(MODEL_DIR, "model.joblib"))
+vectorizer = joblib.load(os.path.join(MODEL_DIR, "vectorizer.joblib"))
+label_encoder = joblib.load(os.path.join(MODEL_DIR, "label_encoder.joblib"))
+threshold = joblib.load(os.path.join(MODEL_DIR, "threshold.joblib"))
+
+
+def legacy_predict_categories(titles):
+    """The original predict / predict_proba / inverse_transform path"""
+    grouped = {}
+    X = vectorizer.transform(titles)
+    predictions = model.predict(X)
+    probabilities = model.predict_proba(X)
+    labels = label_encoder.inverse_transform(predictions)
+
+    for i, (title, label) in enumerate(zip(titles, labels)):
+        confidence = np.max(probabilities[i])
+        final_label = label if confidence >= threshold else "Other"
+        grouped.setdefault(final_label, []).append(title)
+
+    return grouped
+
+
+def time_call(fn, titles, repeats):
+    """Best-of-N wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(titles)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    all_titles = load_titles()
+    random.seed(42)
+
+    # Measure the engine itself; bench_cache.py, bench_dedupe.py,
+    # bench_exact.py and bench_rules.py cover the cache, normalized dedupe,
+    # exact-match table and keyword rules
+    predict.prediction_cache = PredictionCache(0)
+    predict.DEDUPE = "exact"
+    predict.registry.rules_path = None
+    predict.registry.exact_dir = None
+    predict.registry.load()
+
+    # Same outputs over the full training set
+    assert predict_categories(all_titles) == legacy_predict_categories(all_titles)
+    print(f"Outputs match on {len(all_titles)} titles")
+
+    print("\nTitles | Legacy (ms) | Fused (ms) | Speedup")
+    print("-" * 45)
+    for size in (10, 100, 500, 2000):
+        titles = random.choices(all_titles, k=size)
+        legacy = time_call(legacy_predict_categories, titles, repeats=20)
+        fused = time_call(predict_categories, titles, repeats=20)
+        print(f"{size:6d} | {legacy:11.2f} | {fused:10.2f} | {legacy / fused:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import random
+import time
+
+from fastapi.responses import JSONResponse
+
+from backend import fastjson
+from backend import main as app_module
+from backend.main import MAX_TITLE_LENGTH, MAX_TITLES, TabData
+from ml import predict
+from ml.predict import group_titles
+
+from benchmarks.bench_inference import load_titles
+from benchmarks.bench_streaming import call_asgi
+
+
+def best_of(fn, repeats=30):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def codec_only(body, response, fast):
+    """Parse the request and encode the response, nothing else"""
+    if fast:
+        TabData.model_construct(**fastjson.parse_tab_payload(body, MAX_TITLES, MAX_TITLE_LENGTH))
+        fastjson.dumps(response)
+    else:
+        TabData.model_validate_json(body)
+        JSONResponse(response)
+
+
+def end_to_end(body, fast):
+    app_module.FAST_JSON = fast
+    asyncio.run(call_asgi("/categorize_local", body, "application/json"))
+
+
+def main():
+    random.seed(42)
+    all_titles = load_titles()
+    print(f"orjson available: {fastjson.orjson is not None}")
+
+    # Identical repeats would otherwise be answered from the response cache,
+    # and the pydantic and fast rows would share one entry
+    app_module.response_cache.ttl = 0
+
+    print("\nTitles | Codec pydantic (ms) | Codec fast (ms) | E2E pydantic (ms) | E2E fast (ms)")
+    print("-" * 84)
+    for size in (10, 100, 1000, 10000):
+        titles = random.choices(all_titles, k=size)
+        body = json.dumps({"titles": titles}).encode()
+        labels, _ = predict.classify_titles(titles)
+        response = {"categories": group_titles(titles, labels)}
+
+        codec_slow = best_of(lambda: codec_only(body, response, fast=False))
+        codec_fast = best_of(lambda: codec_only(body, response, fast=True))
+        e2e_slow = best_of(lambda: end_to_end(body, fast=False), repeats=10)
+        e2e_fast = best_of(lambda: end_to_end(body, fast=True), repeats=10)
+        print(f"{size:6d} | {codec_slow:19.3f} | {codec_fast:15.3f} | {e2e_slow:17.2f} | {e2e_fast:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Load generator for the /live WebSocket endpoint
+
+Simulates thousands of extension windows, each holding a socket open and
+opening a tab every so often. By default the sockets are driven in-process
+through the ASGI app (no network, no extra packages); pass --url to hit a
+running server instead (needs `pip install websockets`).
+
+    python -m benchmarks.bench_live --sockets 2000
+    python -m benchmarks.bench_live --url ws://localhost:10000/live --sockets 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from backend.batching import percentile
+from benchmarks.bench_inference import load_titles
+
+
+class InProcessSocket:
+    """A WebSocket client wired straight into the ASGI app"""
+
+    def __init__(self, app, path):
+        self.app = app
+        self.path = path
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        self.task = None
+
+    async def open(self):
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "scheme": "ws", "path": self.path, "raw_path": self.path.encode(),
+            "query_string": b"", "root_path": "", "headers": [], "subprotocols": [],
+            "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+        }
+        self.task = asyncio.create_task(self.app(scope, self.inbox.get, self.outbox.put))
+        await self.inbox.put({"type": "websocket.connect"})
+        return (await self.outbox.get())["type"] == "websocket.accept"
+
+    async def send(self, text):
+        await self.inbox.put({"type": "websocket.receive", "text": text})
+
+    async def recv(self):
+        message = await self.outbox.get()
+        if message["type"] == "websocket.close":
+            raise ConnectionError(f"closed with {message.get('code')}")
+        return message["text"]
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+
+class NetworkSocket:
+    """The same interface over a real connection"""
+
+    def __init__(self, url):
+        self.url = url
+        self.ws = None
+
+    async def open(self):
+        import websockets
+
+        try:
+            self.ws = await websockets.connect(self.url, open_timeout=30)
+        except Exception:
+            return False
+        return True
+
+    async def send(self, text):
+        await self.ws.send(text)
+
+    async def recv(self):
+        return await self.ws.recv()
+
+    async def close(self):
+        await self.ws.close()
+
+
+async def simulate_window(socket, titles, tabs, events, think_ms, latencies, counts):
+    if not await socket.open():
+        counts["refused"] += 1
+        return
+    counts["connected"] += 1
+    try:
+        window = {i: random.choice(titles) for i in range(tabs)}
+        start = time.perf_counter()
+        await socket.send(json.dumps({"add": [{"id": i, "title": t} for i, t in window.items()]}))
+        await socket.recv()
+        latencies.append(time.perf_counter() - start)
+
+        next_id = tabs
+        for _ in range(events):
+            await asyncio.sleep(random.expovariate(1000 / think_ms))
+            # Close the oldest tab and open a new one
+            closed = min(window)
+            del window[closed]
+            window[next_id] = random.choice(titles)
+            start = time.perf_counter()
+            await socket.send(json.dumps({"add": [{"id": next_id, "title": window[next_id]}], "remove": [closed]}))
+            await socket.recv()
+            latencies.append(time.perf_counter() - start)
+            counts["events"] += 1
+            next_id += 1
+    except ConnectionError:
+        counts["dropped"] += 1
+    finally:
+        await socket.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Simulate many concurrent /live sockets")
+    parser.add_argument("--sockets", type=int, default=2000)
+    parser.add_argument("--tabs", type=int, default=10, help="tabs sent when each socket opens")
+    parser.add_argument("--events", type=int, default=5, help="tab opens per socket after that")
+    parser.add_argument("--think-ms", type=float, default=200, help="mean pause between a socket's events")
+    parser.add_argument("--cap", type=int, help="in-process only: connection cap (default: --sockets)")
+    parser.add_argument("--url", help="ws:// URL of a running server instead of the in-process app")
+    args = parser.parse_args()
+
+    random.seed(42)
+    titles = load_titles()
+    latencies = []
+    counts = {"connected": 0, "refused": 0, "dropped": 0, "events": 0}
+
+    if args.url:
+        make_socket = lambda: NetworkSocket(args.url)
+        lifespan = None
+    else:
+        import backend.main as app_module
+
+        app_module.live.max_connections = args.cap or args.sockets
+        make_socket = lambda: InProcessSocket(app_module.app, "/live")
+        lifespan = app_module.lifespan(app_module.app)
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            simulate_window(make_socket(), titles, args.tabs, args.events, args.think_ms, latencies, counts)
+            for _ in range(args.sockets)
+        ])
+        return time.perf_counter() - start
+
+    if lifespan is None:
+        elapsed = await run()
+    else:
+        async with lifespan:
+            elapsed = await run()
+
+    latencies_ms = [s * 1000 for s in latencies]
+    print(f"Sockets: {args.sockets} ({counts['connected']} connected, {counts['refused']} refused, "
+          f"{counts['dropped']} dropped)")
+    print(f"Events: {counts['events']} in {elapsed:.1f}s ({counts['events'] / elapsed:.0f}/s)")
+    print(f"Reply latency ms: p50 {percentile(latencies_ms, 50):.1f}  p95 {percentile(latencies_ms, 95):.1f}  "
+          f"p99 {percentile(latencies_ms, 99):.1f}  max {max(latencies_ms, default=0):.1f}")
+    if not args.url:
+        print("Batching:", app_module.batcher.stats.snapshot())
+        print("Live:", app_module.live.snapshot())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
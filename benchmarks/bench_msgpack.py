@@ -0,0 +1,73 @@
+import asyncio
+import json
+import random
+import time
+
+import msgpack
+
+from backend import fastjson, msgpack_codec
+from backend import main as app_module
+from backend.main import MAX_TITLE_LENGTH, MAX_TITLES, TabData
+from ml import predict
+from ml.predict import group_indices
+
+from benchmarks.bench_inference import load_titles
+from benchmarks.bench_streaming import call_asgi
+
+REQUESTS = 50
+
+
+def codec_cpu(decode, encode, body, response, repeats=200):
+    """CPU ms to decode one request and encode its response"""
+    start = time.process_time()
+    for _ in range(repeats):
+        TabData.model_construct(**fastjson.validate_tab_payload(decode(body), MAX_TITLES, MAX_TITLE_LENGTH))
+        encode(response)
+    return (time.process_time() - start) / repeats * 1000
+
+
+async def serve_many(body, content_type, accept):
+    received = 0
+    for _ in range(REQUESTS):
+        _, _, received = await call_asgi("/categorize_local", body, content_type, accept)
+    return received
+
+
+def server_cpu(body, content_type, accept):
+    """CPU ms per request through the whole app, plus the response size"""
+    start = time.process_time()
+    received = asyncio.run(serve_many(body, content_type, accept))
+    return (time.process_time() - start) / REQUESTS * 1000, received
+
+
+def main():
+    random.seed(42)
+    all_titles = load_titles()
+    print(f"orjson available: {fastjson.orjson is not None}")
+
+    # Identical repeats would otherwise be answered from the response cache
+    app_module.response_cache.ttl = 0
+
+    print("\nBoth sides use the index-oriented response (response_format=indices, with confidences)")
+    print("Titles | Format  | Request B | Response B | Codec CPU (ms) | Server CPU/request (ms)")
+    print("-" * 86)
+    for size in (10, 100, 1000, 10000):
+        titles = random.choices(all_titles, k=size)
+        payload = {"titles": titles, "response_format": "indices", "include_confidences": True}
+        labels, confidences = predict.classify_titles(titles)
+        response = {"categories": group_indices(labels), "confidences": [round(c, 4) for c in confidences]}
+
+        cases = (
+            ("JSON", json.dumps(payload).encode(), "application/json",
+             fastjson.loads, fastjson.dumps),
+            ("msgpack", msgpack.packb(payload), msgpack_codec.MEDIA_TYPE,
+             msgpack_codec.unpack, msgpack_codec.pack),
+        )
+        for name, body, media_type, decode, encode in cases:
+            codec = codec_cpu(decode, encode, body, response)
+            cpu, received = server_cpu(body, media_type, media_type)
+            print(f"{size:6d} | {name:7s} | {len(body):9d} | {received:10d} | {codec:14.3f} | {cpu:23.2f}")
+
+
+if __name__ == "__main__":
+    main()
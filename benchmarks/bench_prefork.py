@@ -0,0 +1,109 @@
+import asyncio
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.bench_inference import load_titles
+
+PORT = 18765
+URL = f"http://127.0.0.1:{PORT}"
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_mb(pid):
+    """(RSS, PSS) of a process in MB; PSS splits shared pages between sharers"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0]) / 1024
+    return values["Rss"], values["Pss"]
+
+
+def start_server(mode, workers):
+    env = dict(os.environ, PYTHONWARNINGS="ignore")
+    if mode == "prefork":
+        cmd = [sys.executable, "-m", "backend.serve", "--workers", str(workers), "--port", str(PORT)]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "backend.main:app", "--workers", str(workers),
+               "--port", str(PORT), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # uvicorn serves a single worker in-process rather than forking one
+    expected_children = 0 if mode == "uvicorn" and workers == 1 else workers
+    # "/" answers before the model loads in the background; only /ready
+    # means it's in memory. Each check is a fresh connection the kernel can
+    # hand to any worker, so wait for a run of them to pass, not just one.
+    deadline = time.time() + 60
+    ready_in_a_row = 0
+    while time.time() < deadline and ready_in_a_row < 4 * max(workers, 1):
+        try:
+            ready = httpx.get(URL + "/ready").status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        if ready and len(child_pids(proc.pid)) >= expected_children:
+            ready_in_a_row += 1
+        else:
+            ready_in_a_row = 0
+            time.sleep(0.2)
+    time.sleep(1)
+    return proc
+
+
+async def throughput(titles, seconds=5, concurrency=32, tabs_per_request=40):
+    done = 0
+    stop_at = time.perf_counter() + seconds
+
+    async def client(c):
+        nonlocal done
+        while time.perf_counter() < stop_at:
+            payload = {"titles": random.choices(titles, k=tabs_per_request)}
+            r = await c.post(URL + "/categorize_local", json=payload)
+            r.raise_for_status()
+            done += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as c:
+        await asyncio.gather(*(client(c) for _ in range(concurrency)))
+    return done / seconds
+
+
+def main():
+    random.seed(42)
+    titles = load_titles()
+
+    print("Mode     | Workers | Total PSS (MB) | PSS/worker (MB) | RSS/worker (MB) | req/s")
+    print("-" * 80)
+    for workers in (1, 2, 4, 8):
+        for mode in ("uvicorn", "prefork"):
+            proc = start_server(mode, workers)
+            try:
+                pids = child_pids(proc.pid)
+                mem = [memory_mb(p) for p in pids or [proc.pid]]
+                total_pss = sum(pss for _, pss in mem)
+                if pids:
+                    total_pss += memory_mb(proc.pid)[1]
+                rps = asyncio.run(throughput(titles))
+                print(f"{mode:8s} | {workers:7d} | {total_pss:14.1f} | "
+                      f"{sum(p for _, p in mem) / len(mem):15.1f} | "
+                      f"{sum(r for r, _ in mem) / len(mem):15.1f} | {rps:5.0f}")
+            finally:
+                proc.send_signal(signal.SIGTERM)
+                proc.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import json
+import random
+import re
+import time
+
+from ml import predict
+from ml.cache import PredictionCache, normalize_title
+from ml.rules import RuleSet, RuleStats
+
+from benchmarks.bench_inference import DATA_PATH
+
+
+def keyword_patterns(rules):
+    """(rule index, whole-word pattern) for every keyword, in rule order"""
+    return [
+        (index, re.compile(rf"(?<!\w){re.escape(normalize_title(keyword))}(?!\w)"))
+        for index, rule in enumerate(rules)
+        for keyword in rule["keywords"]
+    ]
+
+
+def naive_match(patterns, key):
+    """The prototype's approach: test every keyword of every rule against the title"""
+    for index, pattern in patterns:
+        if pattern.search(key):
+            return index
+    return None
+
+
+def best_of(fn, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def padded_rules(rules, extra_keywords):
+    """rules plus a rule of made-up keywords, to see how matching scales"""
+    if not extra_keywords:
+        return rules
+    rng = random.Random(42)
+    filler = ["".join(rng.choices("bcdfghjklmnpqrstvwxz", k=8)) for _ in range(extra_keywords)]
+    return rules + [{"name": "filler", "category": "Other", "keywords": filler}]
+
+
+def main():
+    with open(DATA_PATH) as f:
+        data = json.load(f)
+    keys = [normalize_title(item["title"]) for item in data]
+    with open(predict.RULES_PATH) as f:
+        rules = json.load(f)["rules"]
+
+    # The automaton picks the same rule as scanning keyword by keyword
+    ruleset = RuleSet(rules)
+    patterns = keyword_patterns(rules)
+    for key in keys:
+        assert ruleset.match(key) == naive_match(patterns, key), key
+    print(f"Automaton matches the keyword scan on {len(keys)} titles")
+
+    print("\nKeywords | Keyword scan (titles/s) | Automaton (titles/s)")
+    print("-" * 58)
+    for extra in (0, 100, 1000):
+        padded = padded_rules(rules, extra)
+        compiled = RuleSet(padded)
+        padded_patterns = keyword_patterns(padded)
+        count = len(padded_patterns)
+        naive = best_of(lambda: [naive_match(padded_patterns, key) for key in keys], repeats=1)
+        automaton = best_of(lambda: [compiled.match(key) for key in keys])
+        print(f"{count:8d} | {len(keys) / naive:23.0f} | {len(keys) / automaton:20.0f}")
+
+    # End to end, cache and exact-match table off so every title reaches
+    # the rule tier
+    predict.prediction_cache = PredictionCache(0)
+    predict.registry.exact_dir = None
+    titles = [item["title"] for item in data]
+    predict.registry.rules_path = None
+    predict.registry.load()
+    model_seconds = best_of(lambda: predict.classify_titles(titles))
+    model_labels, _ = predict.classify_titles(titles)
+
+    predict.registry.rules_path = predict.RULES_PATH
+    predict.registry.load()
+    predict.rule_stats = RuleStats()
+    labels, _ = predict.classify_titles(titles)
+    stats = predict.rule_stats.snapshot()
+    rules_seconds = best_of(lambda: predict.classify_titles(titles))
+
+    matched = [i for i, key in enumerate(keys) if ruleset.match(key) is not None]
+    rule_correct = sum(labels[i] == data[i]["category"] for i in matched)
+    model_correct = sum(model_labels[i] == data[i]["category"] for i in matched)
+
+    print(f"\nRules absorb {stats['absorbed']} of {stats['titles']} titles "
+          f"({stats['absorbed_fraction']:.1%}); per rule:")
+    for name in ruleset.names:
+        print(f"  {name}: {stats.get(f'hits_{name}', 0)}")
+    print(f"Absorbed titles labelled correctly: rules {rule_correct}/{len(matched)}, "
+          f"model alone {model_correct}/{len(matched)}")
+    print(f"classify_titles on {len(titles)} titles: model only {model_seconds * 1000:.1f} ms, "
+          f"with rules {rules_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
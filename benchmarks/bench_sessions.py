@@ -0,0 +1,84 @@
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+import backend.main as app_module
+from ml import predict
+from ml.cache import PredictionCache
+
+from benchmarks.bench_inference import load_titles
+
+CLICKS = 20
+
+
+def churn(tabs, titles, fraction, next_id):
+    """Close fraction of the window's tabs and open as many new ones"""
+    closed = random.sample(sorted(tabs), max(1, int(len(tabs) * fraction)))
+    for tab_id in closed:
+        del tabs[tab_id]
+    opened = {}
+    for _ in closed:
+        opened[next_id] = random.choice(titles)
+        next_id += 1
+    tabs.update(opened)
+    return closed, opened, next_id
+
+
+async def run(client, titles, window, fraction):
+    random.seed(window)
+    tabs = {i: random.choice(titles) for i in range(window)}
+    next_id = window
+
+    body = json.dumps({"add": [{"id": i, "title": t} for i, t in tabs.items()]})
+    session_id = (await client.post("/sessions", content=body)).json()["session_id"]
+
+    full = {"bytes": 0, "seconds": 0.0}
+    delta = {"bytes": 0, "seconds": 0.0}
+    scored_before = app_module.metrics.counters.get("tidytabs_session_titles_total", 0)
+    for _ in range(CLICKS):
+        closed, opened, next_id = churn(tabs, titles, fraction, next_id)
+
+        body = json.dumps({"titles": list(tabs.values()), "response_format": "indices"})
+        start = time.perf_counter()
+        await client.post("/categorize_local", content=body)
+        full["seconds"] += time.perf_counter() - start
+        full["bytes"] += len(body)
+
+        body = json.dumps({"add": [{"id": i, "title": t} for i, t in opened.items()], "remove": closed})
+        start = time.perf_counter()
+        response = await client.post(f"/sessions/{session_id}/delta", content=body)
+        delta["seconds"] += time.perf_counter() - start
+        delta["bytes"] += len(body)
+        assert response.json()["size"] == len(tabs)
+
+    scored = app_module.metrics.counters["tidytabs_session_titles_total"] - scored_before
+    return full, delta, scored
+
+
+async def main():
+    titles = load_titles()
+
+    # Keep the caches out of the measurement so full re-sends do real work
+    predict.prediction_cache = PredictionCache(0)
+    app_module.response_cache.ttl = 0
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with app_module.lifespan(app_module.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                     headers={"Content-Type": "application/json"}) as client:
+            print(f"{CLICKS} organize clicks per row; full = /categorize_local, delta = /sessions")
+            print("Tabs | Churn | full KB | delta KB | full ms | delta ms | titles scored (full / delta)")
+            print("-" * 88)
+            for window in (50, 200, 1000):
+                for fraction in (0.02, 0.1, 0.5):
+                    full, delta, scored = await run(client, titles, window, fraction)
+                    print(f"{window:4d} | {fraction:5.0%} | {full['bytes'] / 1024:7.1f} | "
+                          f"{delta['bytes'] / 1024:8.1f} | {full['seconds'] * 1000:7.1f} | "
+                          f"{delta['seconds'] * 1000:8.1f} | {window * CLICKS} / {scored}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+import json
+import subprocess
+import sys
+
+# Each loader runs in a fresh interpreter so import cost and RSS are isolated
+JOBLIB_LOADER = """
+import os, joblib
+from ml.predict import MODEL_DIR
+for name in ("model", "vectorizer", "label_encoder", "threshold"):
+    joblib.load(os.path.join(MODEL_DIR, name + ".joblib"))
+"""
+
+BUNDLE_LOADER = """
+from ml.bundle import load_bundle
+from ml.predict import BUNDLE_DIR
+vectorizer, engine, _ = load_bundle(BUNDLE_DIR)
+engine.classify(vectorizer.transform(["New Tab"]))
+"""
+
+PROBE = """
+import json, resource, sys, time, warnings
+warnings.simplefilter("ignore")
+start = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "sklearn_imported": "sklearn" in sys.modules,
+}))
+"""
+
+
+def measure(loader, runs=5):
+    """Median load time and RSS over fresh interpreters"""
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE, loader],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    results.sort(key=lambda r: r["seconds"])
+    return results[len(results) // 2]
+
+
+def main():
+    print("Loader | Load time (ms) | Max RSS (MB) | sklearn imported")
+    print("-" * 58)
+    for name, loader in (("joblib", JOBLIB_LOADER), ("bundle", BUNDLE_LOADER)):
+        r = measure(loader)
+        print(f"{name:6s} | {r['seconds'] * 1000:14.1f} | {r['max_rss_mb']:12.1f} | {r['sklearn_imported']}")
+
+
+if __name__ == "__main__":
+    main()
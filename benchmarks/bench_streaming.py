@@ -0,0 +1,93 @@
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+
+from backend import main as server
+from backend.coalescing import ResponseCache
+from backend.main import app
+from ml import predict
+from ml.cache import PredictionCache
+
+from benchmarks.bench_inference import load_titles
+
+BODY_CHUNK = 16 * 1024
+
+
+async def call_asgi(path, body, content_type, accept="*/*"):
+    """
+    Drive the ASGI app directly so the first response body chunk can be
+    timestamped (test clients buffer the whole response)
+    """
+    chunks = [body[i : i + BODY_CHUNK] for i in range(0, len(body), BODY_CHUNK)] or [b""]
+    sent = 0
+    first_body_at = None
+    received = 0
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+        "headers": [(b"content-type", content_type.encode()), (b"accept", accept.encode())],
+    }
+
+    async def receive():
+        nonlocal sent
+        if sent == len(chunks):
+            # Body fully sent; the client stays connected until the response ends
+            await asyncio.Event().wait()
+        chunk = chunks[sent]
+        sent += 1
+        return {"type": "http.request", "body": chunk, "more_body": sent < len(chunks)}
+
+    async def send(message):
+        nonlocal first_body_at, received
+        if message["type"] == "http.response.body" and message.get("body"):
+            if first_body_at is None:
+                first_body_at = time.perf_counter()
+            received += len(message["body"])
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return first_body_at - start, time.perf_counter() - start, received
+
+
+def measure(path, body, content_type):
+    """Timings from a plain run, peak allocation from a traced second run"""
+    first, total, _ = asyncio.run(call_asgi(path, body, content_type))
+    tracemalloc.start()
+    asyncio.run(call_asgi(path, body, content_type))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first * 1000, total * 1000, peak / 1024 / 1024
+
+
+def main():
+    random.seed(42)
+    all_titles = load_titles()
+    predict.prediction_cache = PredictionCache(0)
+    # measure() sends each body twice; the traced run must not be a
+    # response-cache hit
+    server.response_cache = ResponseCache(0)
+
+    print("Titles | Endpoint                | First byte (ms) | Total (ms) | Peak alloc (MB)")
+    print("-" * 83)
+    # The largest size stays within MAX_TITLES, or /categorize_local would
+    # only be measured producing a 422
+    for size in (1000, 5000, 10000):
+        titles = random.choices(all_titles, k=size)
+        cases = (
+            ("/categorize_local", json.dumps({"titles": titles}).encode(), "application/json"),
+            ("/categorize_stream", json.dumps(titles).encode(), "application/json"),
+            ("/categorize_stream", "\n".join(json.dumps(t) for t in titles).encode(), "application/x-ndjson"),
+        )
+        for path, body, content_type in cases:
+            first, total, peak = measure(path, body, content_type)
+            label = path if "ndjson" not in content_type else path + " (nd)"
+            print(f"{size:6d} | {label:23s} | {first:15.1f} | {total:10.1f} | {peak:15.1f}")
+
+
+if __name__ == "__main__":
+    main()
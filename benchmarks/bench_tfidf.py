@@ -0,0 +1,67 @@
+import os
+import random
+import time
+
+import joblib
+import numpy as np
+
+from ml.bundle import load_bundle
+from ml.predict import BUNDLE_DIR, MODEL_DIR
+from ml.tfidf import TitleVectorizer
+
+from benchmarks.bench_inference import load_titles
+
+
+def assert_identical(expected, actual):
+    """Same sparsity structure and bit-for-bit equal values"""
+    assert expected.shape == actual.shape
+    assert np.array_equal(expected.indptr, actual.indptr)
+    assert np.array_equal(expected.indices, actual.indices)
+    assert np.array_equal(expected.data, actual.data)
+
+
+def check_parity(reference, candidates, titles):
+    expected = reference.transform(titles)
+    for name, vectorizer in candidates.items():
+        assert_identical(expected, vectorizer.transform(titles))
+        # Row by row too, so batching can't hide a per-title difference
+        for title in titles[:500]:
+            assert_identical(reference.transform([title]), vectorizer.transform([title]))
+        print(f"{name}: identical to TfidfVectorizer.transform on {len(titles)} titles")
+
+
+def best_of(vectorizer, titles, repeats=10):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectorizer.transform(titles)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    random.seed(42)
+    titles = load_titles()
+    sklearn_vectorizer = joblib.load(os.path.join(MODEL_DIR, "vectorizer.joblib"))
+    candidates = {
+        "TitleVectorizer.from_sklearn": TitleVectorizer.from_sklearn(sklearn_vectorizer),
+        "bundle TitleVectorizer": load_bundle(BUNDLE_DIR)[0],
+    }
+
+    # Accented, empty and stop-word-only titles exercise the edge cases
+    extra = ["", "the and of", "Café résumé naïve – Ünïcödé", "ＦＵＬＬＷＩＤＴＨ ｔｅｘｔ", "C++ / C# / .NET"]
+    check_parity(sklearn_vectorizer, candidates, titles + extra)
+
+    print("\nTitles | sklearn (titles/s) | TitleVectorizer (titles/s) | Speedup")
+    print("-" * 67)
+    fast = candidates["TitleVectorizer.from_sklearn"]
+    for size in (1, 10, 100, 1000, 2899):
+        batch = random.sample(titles, size)
+        slow_seconds = best_of(sklearn_vectorizer, batch)
+        fast_seconds = best_of(fast, batch)
+        print(f"{size:6d} | {size / slow_seconds:18.0f} | {size / fast_seconds:26.0f} | "
+              f"{slow_seconds / fast_seconds:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,8 @@ document.getElementById("organizeButton").addEventListener("click", async () =>
       const response = await fetch(`${BACKEND_URL}/categorize_local`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ titles }),
+        // Ask for tab positions per category so duplicate titles group correctly
+        body: JSON.stringify({ titles, response_format: "indices" }),
       });
 
       if (!response.ok) {
@@ -45,10 +46,8 @@ document.getElementById("organizeButton").addEventListener("click", async () =>
 
 // === Firefox-specific Tab Grouping ===
 async function organizeTabsFirefox(tabs, groups) {
-  for (const [groupName, titles] of Object.entries(groups)) {
-    const tabIds = tabs
-      .filter(tab => titles.includes(tab.title))
-      .map(tab => tab.id);
+  for (const [groupName, indices] of Object.entries(groups)) {
+    const tabIds = indices.map(i => tabs[i].id);
 
     if (tabIds.length > 0) {
       // Firefox 138+ supports tabs.group
@@ -0,0 +1,59 @@
+# Sklearn-free model bundle: a directory of .npy arrays plus meta.json written
+# by ml/training/train_model.py::export_model_bundle. Arrays are memory-mapped
+# so weights are paged in lazily and shared between processes.
+import json
+import os
+
+import numpy as np
+
+from ml.engine import LinearEngine
+from ml.tfidf import TitleVectorizer
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+def decode_words(array):
+    """Split a newline-joined UTF-8 byte array back into words"""
+    text = array.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+
+def bundle_exists(bundle_dir):
+    """Whether bundle_dir holds an exported bundle"""
+    return os.path.exists(os.path.join(bundle_dir, "meta.json"))
+
+
+def load_bundle(bundle_dir):
+    """
+    Memory-map an exported bundle
+
+    Returns:
+        (vectorizer, engine, meta) where vectorizer has a transform(titles)
+        method and engine is a LinearEngine
+    """
+    with open(os.path.join(bundle_dir, "meta.json")) as f:
+        meta = json.load(f)
+
+    if meta.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format: {meta.get('format_version')}")
+
+    def array(name):
+        return np.load(os.path.join(bundle_dir, f"{name}.npy"), mmap_mode="r")
+
+    vocabulary = {term: i for i, term in enumerate(decode_words(array("terms")))}
+    vectorizer = TitleVectorizer(
+        vocabulary,
+        array("idf"),
+        decode_words(array("stop_words")),
+        lowercase=meta["lowercase"],
+        strip_accents=meta["strip_accents"],
+        token_pattern=meta["token_pattern"],
+        ngram_range=meta["ngram_range"],
+        sublinear_tf=meta["sublinear_tf"],
+    )
+    # Optional: bundles exported before per-class thresholds use the global one
+    thresholds = array("class_thresholds") if os.path.exists(
+        os.path.join(bundle_dir, "class_thresholds.npy")
+    ) else None
+    engine = LinearEngine(array("coef_t"), array("intercept"), array("classes"), meta["threshold"], thresholds)
+    return vectorizer, engine, meta
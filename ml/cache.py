@@ -0,0 +1,90 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# Unread/notification counters such as "(3)" or "(99+)"
+UNREAD_COUNTER = re.compile(r"\(\d+\+?\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_title(title):
+    """Case-fold, drop unread counters and collapse whitespace"""
+    title = UNREAD_COUNTER.sub(" ", title.casefold())
+    return WHITESPACE.sub(" ", title).strip()
+
+
+def artifact_fingerprint(paths):
+    """Short hash of the name, size and mtime of each artifact file"""
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+class PredictionCache:
+    """
+    Bounded LRU map of normalized title -> (label, confidence)
+
+    Entries belong to one model version; looking up with a different
+    version clears the cache so a new model never serves stale labels.
+    A maxsize of 0 disables caching.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys, version):
+        """Cached values aligned with keys, None for each miss"""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            values = []
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                values.append(value)
+            hits = len(values) - values.count(None)
+            self.hits += hits
+            self.misses += len(values) - hits
+        return values
+
+    def put_many(self, items, version):
+        """Insert (key, value) pairs, evicting least recently used entries"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if version != self.version:
+                return
+            for key, value in items:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "model_version": self.version,
+        }
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+def class_threshold_vector(classes, threshold, class_thresholds=None):
+    """
+    Confidence threshold for each class, aligned with classes
+
+    Args:
+        classes: Class names in engine order
+        threshold: Global threshold, used for classes without their own
+        class_thresholds: Optional {class name: threshold}
+
+    Returns:
+        float64 array of len(classes)
+    """
+    thresholds = np.full(len(classes), float(threshold))
+    for i, name in enumerate(classes):
+        if class_thresholds and name in class_thresholds:
+            thresholds[i] = float(class_thresholds[name])
+    return thresholds
+
+
+class LinearEngine:
+    """
+    Fused inference for a multinomial linear classifier
+
+    Pulls the coefficient matrix, intercepts and class names out of the
+    fitted model once, then scores, picks the best class, applies the
+    threshold of that class and maps to labels in a single vectorized pass.
+    """
+
+    def __init__(self, coef_t, intercept, classes, threshold, thresholds=None):
+        # (features, classes) layout so sparse X @ coef_t stays row-major.
+        # Already-contiguous float64 arrays (e.g. memory-maps) are not copied.
+        self.coef_t = np.ascontiguousarray(coef_t, dtype=np.float64)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes = np.asarray(classes, dtype=object)
+        self.threshold = float(threshold)
+        # Per-class thresholds aligned with classes (the global one by default)
+        self.thresholds = (
+            np.full(len(self.classes), self.threshold) if thresholds is None
+            else np.asarray(thresholds, dtype=np.float64)
+        )
+
+    def classify(self, X):
+        """Return (labels, confidences) arrays for a feature matrix"""
+        scores = np.asarray(X @ self.coef_t)
+        scores += self.intercept
+
+        best = scores.argmax(axis=1)
+        top = scores[np.arange(scores.shape[0]), best]
+
+        # Max softmax probability is 1 / sum(exp(s - s_max))
+        scores -= top[:, None]
+        np.exp(scores, out=scores)
+        confidences = 1.0 / scores.sum(axis=1)
+
+        labels = self.classes[best]
+        labels[confidences < self.thresholds[best]] = "Other"
+        return labels, confidences
+
+
+class ModelEngine:
+    """Fallback for classifiers without a multinomial linear form"""
+
+    def __init__(self, model, classes, threshold, thresholds=None):
+        self.model = model
+        self.classes = np.asarray(classes, dtype=object)
+        self.threshold = float(threshold)
+        self.thresholds = (
+            np.full(len(self.classes), self.threshold) if thresholds is None
+            else np.asarray(thresholds, dtype=np.float64)
+        )
+
+    def classify(self, X):
+        """Return (labels, confidences) arrays for a feature matrix"""
+        predictions = self.model.predict(X)
+        confidences = self.model.predict_proba(X).max(axis=1)
+
+        labels = self.classes[predictions]
+        labels[confidences < self.thresholds[predictions]] = "Other"
+        return labels, confidences
+
+
+def is_multinomial_linear(model):
+    """Whether predict_proba is a softmax over coef_ @ x + intercept_"""
+    return (
+        type(model).__name__ == "LogisticRegression"
+        and len(model.classes_) > 2
+        and model.solver != "liblinear"
+        and getattr(model, "multi_class", "auto") != "ovr"
+    )
+
+
+def build_engine(model, label_encoder, threshold, class_thresholds=None):
+    """Pick the fastest engine the fitted model supports"""
+    if is_multinomial_linear(model):
+        classes = label_encoder.classes_[model.classes_]
+        thresholds = class_threshold_vector(classes, threshold, class_thresholds)
+        return LinearEngine(model.coef_.T, model.intercept_, classes, threshold, thresholds)
+
+    classes = label_encoder.classes_
+    thresholds = class_threshold_vector(classes, threshold, class_thresholds)
+    return ModelEngine(model, classes, threshold, thresholds)
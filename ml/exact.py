@@ -0,0 +1,67 @@
+# Exact-match table written by ml/training/train_model.py::export_exact_matches:
+# training titles the model already gets right with high confidence, keyed
+# by a 64-bit hash of the normalized title. A directory of .npy arrays:
+#   hashes.npy       sorted uint64
+#   labels.npy       uint8 index into classes.npy, aligned with hashes
+#   confidences.npy  float64 confidence the model gave, aligned with hashes
+#   classes.npy      label names
+import hashlib
+import os
+
+import numpy as np
+
+
+def hash_keys(keys):
+    """uint64 array of stable 64-bit hashes (blake2b) of normalized titles"""
+    blake2b = hashlib.blake2b
+    digests = b"".join([blake2b(key.encode("utf-8"), digest_size=8).digest() for key in keys])
+    return np.frombuffer(digests, dtype="<u8").astype(np.uint64)
+
+
+def exact_table_exists(table_dir):
+    return os.path.exists(os.path.join(table_dir, "hashes.npy"))
+
+
+class ExactMatchTable:
+    """
+    Sorted hashes of known titles with their label and confidence
+
+    A batch of keys is hashed, then located with one np.searchsorted over
+    the memory-mapped hashes, so there is no per-title dict of strings to
+    build or keep in memory.
+    """
+
+    def __init__(self, hashes, labels, confidences, classes):
+        self.hashes = hashes
+        self.labels = labels
+        self.confidences = confidences
+        self.classes = [str(name) for name in classes]
+
+    @classmethod
+    def load(cls, table_dir):
+        def array(name):
+            return np.load(os.path.join(table_dir, f"{name}.npy"), mmap_mode="r")
+
+        return cls(array("hashes"), array("labels"), array("confidences"), array("classes"))
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def lookup(self, keys):
+        """Known values aligned with keys: (label, confidence), or None for each miss"""
+        values = [None] * len(keys)
+        if not keys or not len(self.hashes):
+            return values
+
+        queries = hash_keys(keys)
+        rows = np.searchsorted(self.hashes, queries)
+        # Past-the-end positions can't match; point them at a real row
+        rows[rows == len(self.hashes)] = 0
+        found = np.flatnonzero(self.hashes[rows] == queries)
+        rows = rows[found]
+        classes = self.classes
+        for i, label, confidence in zip(
+            found.tolist(), self.labels[rows].tolist(), self.confidences[rows].tolist()
+        ):
+            values[i] = (classes[label], confidence)
+        return values
@@ -0,0 +1,119 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket upper bounds: seconds from 10µs to ~10s, sizes from 1 to 16384
+SECONDS_BUCKETS = tuple(1e-5 * 2 ** i for i in range(21))
+SIZE_BUCKETS = tuple(2 ** i for i in range(15))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram
+
+    Observing is a bisect plus a few increments, cheap enough to leave on
+    in production. Quantiles are reported as the upper bound of the bucket
+    that holds them, so they are accurate to within one bucket (a factor
+    of 2).
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Process-wide histograms, counters and on-demand gauges"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram(buckets))
+        histogram.observe(value)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def register_gauges(self, prefix, snapshot):
+        """Export every numeric value of snapshot() as prefix_<key> at render time"""
+        self.gauges[prefix] = snapshot
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("tidytabs_stage_seconds", time.perf_counter() - start, stage=stage)
+
+    def render(self):
+        """Prometheus text exposition of everything recorded so far"""
+        with self._lock:
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+
+        lines = []
+        for name in sorted({name for (name, _), _ in histograms}):
+            lines.append(f"# TYPE {name} summary")
+            for (metric, labels), histogram in histograms:
+                if metric != name:
+                    continue
+                for q in QUANTILES:
+                    lines.append(f"{name}{format_labels(labels + (('quantile', q),))} {histogram.quantile(q):.6g}")
+                lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum:.6g}")
+                lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+        for name, value in counters:
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+
+        for prefix, snapshot in gauges:
+            for key, value in sorted(snapshot().items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
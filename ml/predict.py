@@ -1,56 +1,301 @@
 import os
-import joblib
-import numpy as np
+import threading
+import time
+
+from ml.cache import PredictionCache, normalize_title
+from ml.metrics import metrics
+from ml.registry import ModelRegistry
+from ml.rules import RuleStats
 
 # Path to the sklearn directory
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "sklearn")
+BUNDLE_DIR = os.path.join(MODEL_DIR, "bundle")
+# Exact-match table of training titles, written alongside the model
+EXACT_DIR = os.path.join(MODEL_DIR, "exact")
+
+# Keyword rules checked before the model ("" disables them)
+RULES_PATH = os.getenv("TIDYTABS_RULES", os.path.join(os.path.dirname(__file__), "rules.json"))
+
+# Per-title prediction cache size (0 disables it)
+CACHE_SIZE = int(os.getenv("TIDYTABS_CACHE_SIZE", "10000"))
+
+# How duplicate titles in one batch are collapsed before vectorizing:
+# "normalized" (same key as the cache), "exact" or "off"
+DEDUPE = os.getenv("TIDYTABS_DEDUPE", "normalized")
+
+# predict_categories() key for titles a deadline left unclassified
+UNCLASSIFIED = "Unclassified"
 
-# Load model components once
-try:
-    model = joblib.load(os.path.join(MODEL_DIR, "model.joblib"))
-    vectorizer = joblib.load(os.path.join(MODEL_DIR, "vectorizer.joblib"))
-    label_encoder = joblib.load(os.path.join(MODEL_DIR, "label_encoder.joblib"))
-    try:
-        threshold = joblib.load(os.path.join(MODEL_DIR, "threshold.joblib"))
-    except:
-        threshold = 0.50  # Reasonable default threshold
-except Exception as e:
-    model = vectorizer = label_encoder = None
-    threshold = 0.50
-
-def predict_categories(titles: list[str]) -> dict:
+# Holds the active model, preferring the memory-mapped bundle.
+# registry.active is swapped atomically on reload.
+registry = ModelRegistry(MODEL_DIR, BUNDLE_DIR, RULES_PATH or None, EXACT_DIR)
+_load_lock = threading.Lock()
+
+prediction_cache = PredictionCache(CACHE_SIZE)
+rule_stats = RuleStats()
+metrics.register_gauges("tidytabs_cache", prediction_cache.snapshot)
+metrics.register_gauges("tidytabs_rules", rule_stats.snapshot)
+metrics.register_gauges("tidytabs_model", registry.snapshot)
+
+def load_model():
     """
-    Predict categories for browser tab titles with optimized threshold
+    Load the model unless a load was already attempted
+
+    Importing this module stays cheap: numpy, scipy (and scikit-learn for
+    joblib artifacts) are only imported here. The server calls this from a
+    background startup task; anything else gets it on its first classify
+    call. A failed load leaves every title as "Other" and is recorded in
+    registry.last_error (the artifact watcher keeps retrying).
+
+    Returns:
+        The active LoadedModel, or None
+    """
+    with _load_lock:
+        if registry.active is None and registry.last_error is None:
+            try:
+                registry.load()
+            except Exception as e:
+                registry.last_error = str(e)
+    return registry.active
+
+def dedupe_indices(indices, titles, keys):
+    """
+    Collapse duplicate titles among indices according to DEDUPE
+
+    Returns:
+        (unique, slots) where unique holds the first index of each distinct
+        title and slots maps every entry of indices to its position in unique
+    """
+    if DEDUPE == "off":
+        return indices, list(range(len(indices)))
+
+    dedupe_keys = keys if DEDUPE == "normalized" else titles
+    first_seen = {}
+    unique = []
+    slots = []
+    for i in indices:
+        slot = first_seen.setdefault(dedupe_keys[i], len(unique))
+        if slot == len(unique):
+            unique.append(i)
+        slots.append(slot)
+    return unique, slots
+
+def lookup_cached(model, titles):
+    """
+    Cheap tier: fill in every title whose prediction is cached
+
+    Returns:
+        (keys, labels, confidences, misses) with None in labels and
+        confidences at the positions listed in misses
+    """
+    with metrics.timer("cache_lookup"):
+        keys = [normalize_title(title) for title in titles]
+        labels = [None] * len(titles)
+        confidences = [None] * len(titles)
+        misses = []
+        for i, cached in enumerate(prediction_cache.get_many(keys, model.version)):
+            if cached is None:
+                misses.append(i)
+            else:
+                labels[i], confidences[i] = cached
+    return keys, labels, confidences, misses
+
+def fill_duplicates(misses, unique, slots, labels, confidences):
+    """Copy each distinct title's result to the misses that duplicate it"""
+    for i, slot in zip(misses, slots):
+        first = unique[slot]
+        if i != first:
+            labels[i] = labels[first]
+            confidences[i] = confidences[first]
+
+def lookup_exact(model, keys, misses, labels, confidences):
+    """
+    Exact-match tier: fill in misses that are known training titles
+
+    The table only holds titles the model labels correctly with high
+    confidence, so a hit returns what scoring would, without vectorizing.
+
+    Returns:
+        The misses not in the table
+    """
+    if model.exact is None or not misses:
+        return misses
+
+    with metrics.timer("exact_lookup"):
+        remaining = []
+        for i, known in zip(misses, model.exact.lookup([keys[i] for i in misses])):
+            if known is None:
+                remaining.append(i)
+            else:
+                labels[i], confidences[i] = known
+    metrics.increment("tidytabs_exact_match_hits_total", len(misses) - len(remaining))
+    return remaining
+
+def apply_rules(model, keys, misses, labels, confidences):
+    """
+    Rule tier: label the misses whose title matches a keyword rule
+
+    Matched titles get the rule's category with confidence 1.0 and never
+    reach the vectorizer. Hits are cached like model predictions, so a
+    repeat is served by the cache tier without being scanned again.
+
+    Returns:
+        The misses no rule matched
+    """
+    rules = model.rules
+    if rules is None or not misses:
+        rule_stats.record(len(keys), [])
+        return misses
+
+    with metrics.timer("rules"):
+        remaining = []
+        names = []
+        for i in misses:
+            index = rules.match(keys[i])
+            if index is None:
+                remaining.append(i)
+            else:
+                labels[i] = rules.categories[index]
+                confidences[i] = 1.0
+                names.append(rules.names[index])
+    if len(remaining) < len(misses):
+        matched = set(misses).difference(remaining)
+        prediction_cache.put_many([(keys[i], (labels[i], 1.0)) for i in matched], model.version)
+    rule_stats.record(len(keys), names)
+    return remaining
+
+def score_titles(model, titles, keys, indices, labels, confidences):
+    """Vectorize and score titles[indices], filling in and caching their results"""
+    with metrics.timer("vectorize"):
+        X = model.vectorizer.transform([titles[i] for i in indices])
+    with metrics.timer("score"):
+        scored_labels, scored_confidences = model.engine.classify(X)
+
+    for i, label, confidence in zip(indices, scored_labels.tolist(), scored_confidences.tolist()):
+        labels[i] = label
+        confidences[i] = confidence
+
+    prediction_cache.put_many(
+        [(keys[i], (labels[i], confidences[i])) for i in indices], model.version
+    )
+
+def classify_titles(titles: list[str]) -> tuple[list, list]:
+    """
+    Label each title without grouping
 
     Args:
         titles: List of tab titles to classify
 
     Returns:
-        Dictionary with categories as keys and lists of titles as values
+        (labels, confidences) lists aligned with titles. Titles the model
+        can't score are labelled "Other" with confidence 0.0
     """
-    grouped = {}
+    if not titles:
+        return [], []
+
+    # Read the active model once so a concurrent reload can't mix versions
+    model = registry.active or load_model()
+    if model is None:
+        return ["Other"] * len(titles), [0.0] * len(titles)
+    return classify_batch(model, titles)
+
+def classify_batch(model, titles):
+    """classify_titles against one model, through every tier"""
+    # Serve repeats from the cache; every other tier sees each distinct
+    # miss once: known training titles, then keyword rules, then the model
+    keys, labels, confidences, misses = lookup_cached(model, titles)
+    if not misses:
+        return labels, confidences
+
+    unique, slots = dedupe_indices(misses, titles, keys)
+    pending = lookup_exact(model, keys, unique, labels, confidences)
+    pending = apply_rules(model, keys, pending, labels, confidences)
+    if pending:
+        try:
+            score_titles(model, titles, keys, pending, labels, confidences)
+        except Exception:
+            return ["Other"] * len(titles), [0.0] * len(titles)
+
+    fill_duplicates(misses, unique, slots, labels, confidences)
+    return labels, confidences
+
+def classify_titles_within(titles: list[str], deadline: float, chunk_size: int = 64) -> tuple[list, list]:
+    """
+    Label as many titles as fit before a deadline
+
+    Titles go through every tier (cache, exact match, rules, model)
+    chunk_size at a time, in input order, so the budget bounds the whole
+    call rather than only the scoring. A chunk is only started if the
+    previous one suggests it will finish before the deadline; repeats
+    across chunks are served by the prediction cache.
 
-    if not titles or model is None:
-        grouped["Other"] = titles if titles else []
-        return grouped
+    Args:
+        titles: List of tab titles to classify
+        deadline: time.monotonic() value by which to return
+        chunk_size: Titles classified per chunk
+
+    Returns:
+        (labels, confidences) lists aligned with titles, holding None for
+        titles that were left unclassified
+    """
+    if not titles:
+        return [], []
 
-    try:
-        # Transform and predict
-        X = vectorizer.transform(titles)
-        predictions = model.predict(X)
-        probabilities = model.predict_proba(X)
-        labels = label_encoder.inverse_transform(predictions)
+    model = registry.active or load_model()
+    if model is None:
+        return ["Other"] * len(titles), [0.0] * len(titles)
 
-        # Group by category with dynamic threshold
-        for i, (title, label) in enumerate(zip(titles, labels)):
-            confidence = np.max(probabilities[i])
-            final_label = label if confidence >= threshold else "Other"
+    labels = [None] * len(titles)
+    confidences = [None] * len(titles)
+    chunk_seconds = 0.0
+    for start in range(0, len(titles), chunk_size):
+        now = time.monotonic()
+        if now + chunk_seconds > deadline:
+            break
+        end = start + chunk_size
+        labels[start:end], confidences[start:end] = classify_batch(model, titles[start:end])
+        chunk_seconds = time.monotonic() - now
 
-            if final_label not in grouped:
-                grouped[final_label] = []
-            grouped[final_label].append(title)
+    return labels, confidences
+
+def group_titles(titles: list[str], labels: list) -> dict:
+    """Group titles by their label, preserving input order within each group"""
+    grouped = {}
+    for title, label in zip(titles, labels):
+        if label not in grouped:
+            grouped[label] = []
+        grouped[label].append(title)
+    return grouped
+
+def group_indices(labels: list) -> dict:
+    """Group input positions by their label, in ascending order"""
+    grouped = {}
+    for i, label in enumerate(labels):
+        if label not in grouped:
+            grouped[label] = []
+        grouped[label].append(i)
+    return grouped
 
-    except Exception:
-        grouped["Other"] = titles
+def predict_categories(titles: list[str], deadline: float | None = None) -> dict:
+    """
+    Predict categories for browser tab titles with optimized threshold
+
+    Args:
+        titles: List of tab titles to classify
+        deadline: Optional time.monotonic() value to stop classifying at
+
+    Returns:
+        Dictionary with categories as keys and lists of titles as values.
+        Titles the deadline cut off are listed under UNCLASSIFIED
+    """
+    if not titles:
+        return {"Other": []}
 
-    return grouped
\ No newline at end of file
+    if deadline is None:
+        labels, _ = classify_titles(titles)
+    else:
+        labels, _ = classify_titles_within(titles, deadline)
+    grouped = group_titles(titles, labels)
+    if None in grouped:
+        grouped[UNCLASSIFIED] = grouped.pop(None)
+    return grouped
@@ -0,0 +1,182 @@
+import glob
+import os
+import threading
+import time
+
+from ml.cache import artifact_fingerprint
+from ml.rules import RuleSet
+
+# Representative titles run through a freshly loaded model before it serves
+WARMUP_TITLES = [
+    "New Tab",
+    "Inbox (3) - Gmail",
+    "YouTube",
+    "Amazon.ca: Online Shopping",
+    "Two Sum - LeetCode",
+    "Weather Network - Toronto Forecast",
+    "Flights to New York - Google Flights",
+    "CBC News - Breaking News",
+    "Project Plan - Google Docs",
+    "RBC Online Banking",
+]
+
+
+def load_joblib_components(model_dir):
+    """Load the pickled sklearn components (imports scikit-learn)"""
+    import joblib
+    from ml.engine import build_engine
+    from ml.tfidf import TitleVectorizer
+
+    model = joblib.load(os.path.join(model_dir, "model.joblib"))
+    vectorizer = joblib.load(os.path.join(model_dir, "vectorizer.joblib"))
+    label_encoder = joblib.load(os.path.join(model_dir, "label_encoder.joblib"))
+    try:
+        threshold = joblib.load(os.path.join(model_dir, "threshold.joblib"))
+    except:
+        threshold = 0.50  # Reasonable default threshold
+    # {class name: threshold}; older models only have the global one
+    class_thresholds_path = os.path.join(model_dir, "class_thresholds.joblib")
+    class_thresholds = joblib.load(class_thresholds_path) if os.path.exists(class_thresholds_path) else None
+    # Swap in the sklearn-free transform when it can reproduce this vectorizer
+    vectorizer = TitleVectorizer.from_sklearn(vectorizer) or vectorizer
+    return vectorizer, build_engine(model, label_encoder, threshold, class_thresholds)
+
+
+class LoadedModel:
+    """One immutable, warmed-up model version"""
+
+    def __init__(self, vectorizer, engine, version, source, load_seconds, warmup_seconds,
+                 rules=None, exact=None):
+        self.vectorizer = vectorizer
+        self.engine = engine
+        # RuleSet checked before the model, or None
+        self.rules = rules
+        # ExactMatchTable of known training titles, or None
+        self.exact = exact
+        self.version = version
+        self.source = source
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.loaded_at = time.time()
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "threshold": self.engine.threshold,
+            "class_thresholds": {
+                name: threshold
+                for name, threshold in zip(self.engine.classes.tolist(), self.engine.thresholds.tolist())
+                if threshold != self.engine.threshold
+            },
+            "rules": list(zip(self.rules.names, self.rules.categories)) if self.rules else [],
+            "exact_matches": len(self.exact) if self.exact is not None else 0,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "loaded_at": self.loaded_at,
+        }
+
+
+class ModelRegistry:
+    """
+    Holds the active model and swaps in new artifacts without downtime
+
+    A new version is fully loaded and warmed before it replaces the active
+    one in a single attribute assignment. Callers read `active` once per
+    request, so in-flight requests finish on the version they started with.
+    """
+
+    def __init__(self, model_dir, bundle_dir, rules_path=None, exact_dir=None):
+        self.model_dir = model_dir
+        self.bundle_dir = bundle_dir
+        self.rules_path = rules_path
+        self.exact_dir = exact_dir
+        self.active = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+        self._pending_fingerprint = None
+        self._lock = threading.Lock()
+
+    def artifact_paths(self):
+        """Files backing the model that load() would pick right now"""
+        from ml.bundle import bundle_exists
+
+        # The rule file and exact-match table are part of the version, so
+        # changing them reloads too
+        extras = [self.rules_path] if self.rules_path and os.path.exists(self.rules_path) else []
+        if self.exact_dir:
+            extras += glob.glob(os.path.join(self.exact_dir, "*.npy"))
+        if bundle_exists(self.bundle_dir):
+            return glob.glob(os.path.join(self.bundle_dir, "*.npy")) + [
+                os.path.join(self.bundle_dir, "meta.json")
+            ] + extras
+        return glob.glob(os.path.join(self.model_dir, "*.joblib")) + extras
+
+    def load(self):
+        """Load, warm and activate the artifacts currently on disk"""
+        # Deferred so importing the registry doesn't pull in numpy and scipy
+        from ml.bundle import bundle_exists, load_bundle
+        from ml.exact import ExactMatchTable, exact_table_exists
+
+        with self._lock:
+            version = artifact_fingerprint(self.artifact_paths())
+
+            start = time.perf_counter()
+            if bundle_exists(self.bundle_dir):
+                vectorizer, engine, _ = load_bundle(self.bundle_dir)
+                source = "bundle"
+            else:
+                vectorizer, engine = load_joblib_components(self.model_dir)
+                source = "joblib"
+            rules = None
+            if self.rules_path and os.path.exists(self.rules_path):
+                rules = RuleSet.from_file(self.rules_path)
+            exact = None
+            if self.exact_dir and exact_table_exists(self.exact_dir):
+                exact = ExactMatchTable.load(self.exact_dir)
+            load_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            engine.classify(vectorizer.transform(WARMUP_TITLES))
+            warmup_seconds = time.perf_counter() - start
+
+            loaded = LoadedModel(vectorizer, engine, version, source, load_seconds, warmup_seconds,
+                                 rules, exact)
+            if self.active is not None:
+                self.reloads += 1
+            self.active = loaded
+            self.last_error = None
+            return loaded
+
+    def reload_if_changed(self):
+        """
+        Reload when the artifacts on disk differ from the active version
+
+        A change must look the same on two consecutive checks before it is
+        loaded, so a model that is still being written isn't picked up. A
+        failed load keeps the current model serving.
+        """
+        fingerprint = artifact_fingerprint(self.artifact_paths())
+        if self.active is not None and fingerprint == self.active.version:
+            self._pending_fingerprint = None
+            return False
+        if fingerprint != self._pending_fingerprint:
+            self._pending_fingerprint = fingerprint
+            return False
+
+        try:
+            self.load()
+        except Exception as e:
+            self.failed_reloads += 1
+            self.last_error = str(e)
+            return False
+        self._pending_fingerprint = None
+        return True
+
+    def snapshot(self):
+        stats = {"reloads": self.reloads, "failed_reloads": self.failed_reloads}
+        if self.active is not None:
+            stats["load_seconds"] = self.active.load_seconds
+            stats["warmup_seconds"] = self.active.warmup_seconds
+        return stats
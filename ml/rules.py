@@ -0,0 +1,166 @@
+# Keyword rules that label a title before it reaches the model. The rule file
+# is JSON: {"rules": [{"name", "category", "keywords": [...]}, ...]}. Every
+# keyword of every rule is compiled into one Aho-Corasick automaton over
+# words, so a title is scanned once no matter how many keywords there are.
+import json
+import re
+import threading
+from collections import deque
+
+from ml.cache import normalize_title
+
+# Rule names end up in metric names
+RULE_NAME = re.compile(r"^[a-z][a-z0-9_]*$")
+# ASCII bytes that separate words (anything but letters, digits and "_").
+# Splitting the UTF-8 bytes on these is several times faster than \w+ and
+# agrees with it except around non-ASCII punctuation, which stays in words.
+SEPARATORS = bytes(b for b in range(128) if not (chr(b).isalnum() or b == ord("_")))
+WORD_BREAKS = bytes.maketrans(SEPARATORS, b" " * len(SEPARATORS))
+
+
+def split_words(text):
+    """Words of text as UTF-8 byte strings"""
+    return text.encode("utf-8").translate(WORD_BREAKS).split()
+
+
+class AhoCorasick:
+    """
+    Multi-keyword matcher: one pass over a sequence finds every keyword in it
+
+    Keywords and texts are sequences of symbols (here, words). Nodes are
+    dicts of symbol -> child id. A node's failure link points at the
+    longest proper suffix of its path that is also a keyword prefix, and
+    its outputs include those of the node it fails to, so scanning never
+    backtracks over the text.
+    """
+
+    def __init__(self, keywords):
+        """keywords: {keyword tuple: value}; values are reported with each match"""
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for keyword, value in keywords.items():
+            node = 0
+            for symbol in keyword:
+                child = self.goto[node].get(symbol)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[node][symbol] = child
+                node = child
+            self.out[node].append((len(keyword), value))
+
+        # Breadth-first, so every failure target is finished before it's used
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and symbol not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(symbol, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def matches(self, text):
+        """(end, length, value) for every keyword occurrence in text"""
+        goto, fail, out = self.goto, self.fail, self.out
+        found = []
+        node = 0
+        for end, symbol in enumerate(text, 1):
+            while node and symbol not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(symbol, 0)
+            if out[node]:
+                found.extend((end, length, value) for length, value in out[node])
+        return found
+
+
+class RuleSet:
+    """
+    Keyword rules compiled into one automaton
+
+    Keywords are normalized like titles and match whole words only (the
+    automaton runs over the title's words, not its characters). When
+    several rules match a title, the one listed first in the file wins.
+    """
+
+    def __init__(self, rules):
+        self.names = []
+        self.categories = []
+        keywords = {}
+        for index, rule in enumerate(rules):
+            if not RULE_NAME.match(rule.get("name", "")):
+                raise ValueError(f"Rule names must be lowercase identifiers: {rule.get('name')!r}")
+            if not rule.get("category") or not rule.get("keywords"):
+                raise ValueError(f"Rule {rule['name']} needs a category and keywords")
+            self.names.append(rule["name"])
+            self.categories.append(rule["category"])
+            for keyword in rule["keywords"]:
+                # A keyword listed twice belongs to the earlier rule
+                words = tuple(split_words(normalize_title(keyword)))
+                if not words:
+                    raise ValueError(f"Rule {rule['name']} has a keyword without words: {keyword!r}")
+                keywords.setdefault(words, index)
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("Rule names must be unique")
+        self.automaton = AhoCorasick(keywords)
+        # Every match starts with one of these; most titles contain none
+        self.first_words = frozenset(self.automaton.goto[0])
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls(json.load(f)["rules"])
+
+    def match(self, key):
+        """
+        Index of the rule that labels a normalized title
+
+        Returns:
+            The index into names/categories, or None when no rule matches
+        """
+        words = split_words(key)
+        if self.first_words.isdisjoint(words):
+            return None
+        best = None
+        for _, _, index in self.automaton.matches(words):
+            if best is None or index < best:
+                best = index
+        return best
+
+
+class RuleStats:
+    """
+    How many titles the rule tier labels, in total and per rule
+
+    Only distinct titles the cache didn't answer reach the tier, so repeats
+    of a rule-matched title are counted once.
+    """
+
+    def __init__(self):
+        self.titles = 0
+        self.absorbed = 0
+        self.hits = {}
+        self._lock = threading.Lock()
+
+    def record(self, titles, names):
+        """Count titles seen by classification and the rule names that labelled some"""
+        with self._lock:
+            self.titles += titles
+            self.absorbed += len(names)
+            for name in names:
+                self.hits[name] = self.hits.get(name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = {
+                "titles": self.titles,
+                "absorbed": self.absorbed,
+                "absorbed_fraction": self.absorbed / self.titles if self.titles else 0.0,
+            }
+            for name, count in sorted(self.hits.items()):
+                stats[f"hits_{name}"] = count
+        return stats
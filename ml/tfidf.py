@@ -0,0 +1,161 @@
+import re
+import unicodedata
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def strip_accents_ascii(s):
+    """Same transliteration as sklearn's strip_accents='ascii'"""
+    nkfd_form = unicodedata.normalize("NFKD", s)
+    return nkfd_form.encode("ASCII", "ignore").decode("ASCII")
+
+
+class TitleVectorizer:
+    """
+    TF-IDF transform for short titles, matching a fitted TfidfVectorizer
+
+    Built from the fitted vocabulary and idf vector. Every word that occurs
+    in any vocabulary term gets a small integer id, and each term is stored
+    under its word ids folded into one int (base len(words) + 1, ids from
+    1), so n-grams are looked up without building their strings. Stop words
+    are dropped before n-grams are formed, as sklearn does; any other word
+    outside the vocabulary gets id 0, which no term contains, so it just
+    breaks the n-grams that span it. Rows are filled straight into CSR
+    arrays, then sublinear tf, idf and L2 normalization are applied to the
+    whole batch in the same order of float operations as sklearn, so the
+    output is bit-for-bit identical.
+    """
+
+    # Marks a stop word in the word-id lookup
+    STOP = -1
+
+    def __init__(self, vocabulary, idf, stop_words=(), lowercase=True, strip_accents=None,
+                 token_pattern=r"(?u)\b\w\w+\b", ngram_range=(1, 1), sublinear_tf=False):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.lowercase = lowercase
+        self.strip_accents = strip_accents == "ascii"
+        self.token_pattern = re.compile(token_pattern)
+        self.min_n, self.max_n = ngram_range
+        self.sublinear_tf = sublinear_tf
+
+        terms = [(term.split(" "), column) for term, column in vocabulary.items()]
+        words = {}
+        for term_words, _ in terms:
+            for word in term_words:
+                words.setdefault(word, len(words) + 1)
+        self.base = len(words) + 1
+
+        self.columns = {}
+        for term_words, column in terms:
+            key = 0
+            for word in term_words:
+                key = key * self.base + words[word]
+            self.columns[key] = column
+
+        self.word_ids = words
+        for word in stop_words or ():
+            self.word_ids[word] = self.STOP
+
+    @classmethod
+    def from_sklearn(cls, vectorizer):
+        """
+        Build from a fitted TfidfVectorizer
+
+        Returns:
+            A TitleVectorizer, or None when the vectorizer uses options
+            this class doesn't reproduce (custom analyzers, other norms...)
+        """
+        supported = (
+            vectorizer.input == "content"
+            and vectorizer.analyzer == "word"
+            and vectorizer.preprocessor is None
+            and vectorizer.tokenizer is None
+            and vectorizer.strip_accents in (None, "ascii")
+            and vectorizer.norm == "l2"
+            and vectorizer.use_idf
+            and not vectorizer.binary
+            and vectorizer.dtype == np.float64
+        )
+        if not supported:
+            return None
+        return cls(
+            vectorizer.vocabulary_,
+            np.asarray(vectorizer.idf_, dtype=np.float64),
+            vectorizer.get_stop_words(),
+            lowercase=vectorizer.lowercase,
+            strip_accents=vectorizer.strip_accents,
+            token_pattern=vectorizer.token_pattern,
+            ngram_range=vectorizer.ngram_range,
+            sublinear_tf=vectorizer.sublinear_tf,
+        )
+
+    def word_sequence(self, title):
+        """Word ids of title after preprocessing, with stop words dropped"""
+        if self.lowercase:
+            title = title.lower()
+        # NFKD leaves ASCII untouched, so most titles skip it
+        if self.strip_accents and not title.isascii():
+            title = strip_accents_ascii(title)
+        get = self.word_ids.get
+        stop = self.STOP
+        return [i for i in [get(w, 0) for w in self.token_pattern.findall(title)] if i != stop]
+
+    def row_columns(self, ids):
+        """Columns of the vocabulary n-grams in one word id sequence, with repeats"""
+        get = self.columns.get
+        base = self.base
+        keys = []
+        # level holds the keys of every n-gram of the current length, 0
+        # where it spans an unknown word
+        level = ids
+        for n in range(1, self.max_n + 1):
+            if n > 1:
+                level = [key * base + word if key and word else 0 for key, word in zip(level, ids[n - 1:])]
+                if not level:
+                    break
+            if n >= self.min_n:
+                keys.extend(level)
+        return [column for column in map(get, keys) if column is not None]
+
+    def transform(self, titles):
+        """Return the L2-normalized TF-IDF CSR matrix for titles"""
+        indptr = [0]
+        indices = []
+        counts = []
+        for title in titles:
+            columns = self.row_columns(self.word_sequence(title))
+            if len(set(columns)) == len(columns):
+                # The usual case for short titles: every term occurs once
+                columns.sort()
+                indices.extend(columns)
+                counts.extend([1] * len(columns))
+            else:
+                row = {}
+                for column in columns:
+                    row[column] = row.get(column, 0) + 1
+                for column in sorted(row):
+                    indices.append(column)
+                    counts.append(row[column])
+            indptr.append(len(indices))
+
+        data = np.asarray(counts, dtype=np.float64)
+        indices = np.asarray(indices, dtype=np.int32)
+        indptr = np.asarray(indptr, dtype=np.int32)
+
+        if self.sublinear_tf:
+            np.log(data, out=data)
+            data += 1.0
+        data *= self.idf[indices]
+
+        # Per-row sum of squares accumulates in element order, like sklearn's
+        # inplace_csr_row_normalize_l2
+        rows = np.repeat(np.arange(len(titles)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(titles)))
+        norms[norms == 0.0] = 1.0
+        data /= norms[rows]
+
+        return sp.csr_matrix(
+            (data, indices, indptr), shape=(len(titles), len(self.vocabulary))
+        )
@@ -57,79 +57,10 @@ def analyze_misclassification():
         
         print("-" * 60)
 
-def create_education_rules():
-    """Create rule-based overrides for obvious education cases"""
-    
-    education_keywords = [
-        # Universities and colleges
-        'university', 'college', 'uoft', 'utoronto', 'ryerson', 'york university',
-        'mcmaster', 'waterloo', 'queens', 'ubc', 'mcgill', 'carleton',
-        
-        # Academic terms
-        'course', 'gpa', 'grade', 'academic', 'semester', 'transcript',
-        'enrollment', 'registration', 'tuition', 'scholarship', 'professor',
-        'lecture', 'tutorial', 'exam', 'assignment', 'syllabus',
-        
-        # Educational platforms
-        'rate my professor', 'ratemyprofessor', 'course selection',
-        'degree audit', 'academic calendar', 'class schedule'
-    ]
-    
-    return education_keywords
-
 def enhanced_predict_categories(titles: list[str]) -> dict:
-    """Enhanced prediction with rule-based overrides"""
-    
-    # Load model components
-    try:
-        model = joblib.load("ml/model.joblib")
-        vectorizer = joblib.load("ml/vectorizer.joblib")
-        label_encoder = joblib.load("ml/label_encoder.joblib")
-    except:
-        return {"Other": titles}
-    
-    grouped = {}
-    education_keywords = create_education_rules()
-    
-    for title in titles:
-        try:
-            # First, check for education rule overrides
-            title_lower = title.lower()
-            is_education = False
-            
-            # Check for university/education keywords
-            for keyword in education_keywords:
-                if keyword in title_lower:
-                    is_education = True
-                    break
-            
-            if is_education:
-                category = "Education"
-                print(f"Rule override: '{title}' -> Education")
-            else:
-                # Use ML model
-                X = vectorizer.transform([title])
-                prediction = model.predict(X)[0]
-                probability = model.predict_proba(X)[0]
-                confidence = np.max(probability)
-                
-                if confidence < 0.05:
-                    category = "Other"
-                else:
-                    category = label_encoder.inverse_transform([prediction])[0]
-            
-            # Add to grouped results
-            if category not in grouped:
-                grouped[category] = []
-            grouped[category].append(title)
-            
-        except Exception as e:
-            print(f"Error processing '{title}': {e}")
-            if "Other" not in grouped:
-                grouped["Other"] = []
-            grouped["Other"].append(title)
-    
-    return grouped
+    """Prediction with rule-based overrides (the rule tier of ml/predict.py, rules in ml/rules.json)"""
+    from ml.predict import predict_categories
+    return predict_categories(titles)
 
 def improve_training_data():
     """Suggest improvements to training data"""
@@ -9,8 +9,15 @@ from sklearn.model_selection import train_test_split, cross_val_score, Stratifie
 from sklearn.metrics import accuracy_score, classification_report
 import numpy as np
 import os
+import sys
 from collections import Counter
 
+# The exporters share code with the serving side (ml.engine, ml.bundle, ...);
+# run as a file rather than with `python -m ml.training.train_model`, the
+# repo root isn't on the path yet
+if __name__ == "__main__" and not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
 def load_and_prepare_data(file_path="ml/data/training_data_realistic.json"):
     """Load training data from JSON file with data quality checks"""
     with open(file_path) as f:
@@ -200,7 +207,65 @@ def calculate_optimal_threshold(model, vectorizer, label_encoder, titles, catego
     print(f"\nSelected threshold: {best_threshold:.2f}")
     return best_threshold
 
-def save_model_components(model, vectorizer, label_encoder, threshold=0.5, metadata=None):
+def calculate_class_thresholds(model, vectorizer, label_encoder, titles, categories, global_threshold):
+    """
+    Pick a confidence threshold per predicted class with the same scoring
+
+    High-precision classes (e.g. "New Tabs") can go lower than the global
+    threshold and keep more coverage; the others can only go higher.
+    Classes predicted too rarely on the validation slice keep the global one.
+
+    Returns:
+        {class name: threshold} for classes whose threshold differs
+    """
+    validation_size = min(500, max(100, len(titles) // 5))
+
+    X_val = vectorizer.transform(titles[-validation_size:])
+    y_val = label_encoder.transform(categories[-validation_size:])
+
+    probabilities = model.predict_proba(X_val)
+    max_probs = np.max(probabilities, axis=1)
+    predictions = model.classes_[np.argmax(probabilities, axis=1)]
+    correct = predictions == y_val
+
+    # Wider grid than the global search: per class, lower is often safe
+    thresholds = np.arange(0.10, 0.62, 0.02)
+    min_support = max(5, validation_size // 50)
+
+    # Only classes this precise may go below the global threshold
+    precision_floor = 0.95
+
+    print("\nPer-class thresholds:")
+    print("Category             | Threshold | Accuracy | Coverage")
+    print("-" * 56)
+
+    class_thresholds = {}
+    for code in np.unique(predictions):
+        mask = predictions == code
+        if np.sum(mask) < min_support:
+            continue
+        # Every candidate threshold at once: rows are thresholds
+        confident = max_probs[mask][None, :] >= thresholds[:, None]
+        counts = confident.sum(axis=1)
+        accuracy = (confident & correct[mask][None, :]).sum(axis=1) / np.maximum(counts, 1)
+        usable = (counts >= min_support) & (
+            (thresholds >= global_threshold - 1e-9) | (accuracy >= precision_floor)
+        )
+        if not usable.any():
+            continue
+        coverage = counts / np.sum(mask)
+        score = np.where(usable, (0.65 * accuracy) + (0.35 * coverage), -1.0)
+        best = int(np.argmax(score))
+
+        name = str(label_encoder.classes_[code])
+        threshold = round(float(thresholds[best]), 2)
+        print(f"{name:20s} | {threshold:9.2f} | {accuracy[best]:8.3f} | {coverage[best]:8.3f}")
+        if threshold != round(float(global_threshold), 2):
+            class_thresholds[name] = threshold
+
+    return class_thresholds
+
+def save_model_components(model, vectorizer, label_encoder, threshold=0.5, metadata=None, class_thresholds=None):
     """Save model components with metadata"""
     output_dir = "ml/sklearn"
     os.makedirs(output_dir, exist_ok=True)
@@ -209,12 +274,150 @@ def save_model_components(model, vectorizer, label_encoder, threshold=0.5, metad
     joblib.dump(vectorizer, os.path.join(output_dir, "vectorizer.joblib"))
     joblib.dump(label_encoder, os.path.join(output_dir, "label_encoder.joblib"))
     joblib.dump(threshold, os.path.join(output_dir, "threshold.joblib"))
+    joblib.dump(class_thresholds or {}, os.path.join(output_dir, "class_thresholds.joblib"))
     
     # Save training metadata
     if metadata:
         with open(os.path.join(output_dir, "training_metadata.json"), 'w') as f:
             json.dump(metadata, f, indent=2)
 
+def retire_model_bundle(output_dir="ml/sklearn/bundle"):
+    """
+    Stop serving the bundle in output_dir so the joblib files take over
+
+    A bundle left from an earlier model is preferred over newer joblib
+    files and is all the model watcher fingerprints. meta.json is what
+    marks a bundle, so it is moved aside in one rename.
+    """
+    meta_path = os.path.join(output_dir, "meta.json")
+    if os.path.exists(meta_path):
+        os.replace(meta_path, meta_path + ".stale")
+        print(f"Retired the previous bundle in {output_dir}")
+
+def export_model_bundle(model, vectorizer, label_encoder, threshold=0.5, output_dir="ml/sklearn/bundle",
+                        class_thresholds=None):
+    """Export a memory-mappable, sklearn-free copy of the model (linear models only)"""
+    from ml.engine import class_threshold_vector, is_multinomial_linear
+    from ml.bundle import BUNDLE_FORMAT_VERSION
+
+    if not is_multinomial_linear(model):
+        print(f"Skipping bundle export: {type(model).__name__} has no multinomial linear form")
+        retire_model_bundle(output_dir)
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Terms ordered by column index so terms[j] is feature j
+    terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+    for term, j in vectorizer.vocabulary_.items():
+        terms[j] = term
+
+    # Word lists are stored as newline-joined UTF-8 bytes rather than
+    # fixed-width unicode arrays, which pad every entry to the longest one
+    def encode_words(words):
+        return np.frombuffer("\n".join(words).encode("utf-8"), dtype=np.uint8)
+
+    classes = label_encoder.classes_[model.classes_].astype(str)
+    arrays = {
+        "terms": encode_words(terms),
+        "idf": vectorizer.idf_.astype(np.float64),
+        "stop_words": encode_words(sorted(vectorizer.get_stop_words() or [])),
+        "coef_t": np.ascontiguousarray(model.coef_.T, dtype=np.float64),
+        "intercept": model.intercept_.astype(np.float64),
+        "classes": classes,
+        # Aligned with classes, the global threshold where a class has none
+        "class_thresholds": class_threshold_vector(classes, threshold, class_thresholds),
+    }
+    # Write to temp files and rename over the old ones: a running server may
+    # have the old arrays memory-mapped, and truncating them in place would
+    # corrupt its weights. meta.json goes last so readers see a complete set.
+    for name, value in arrays.items():
+        path = os.path.join(output_dir, f"{name}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, value, allow_pickle=False)
+        os.replace(path + ".tmp", path)
+
+    meta = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "threshold": float(threshold),
+        "lowercase": vectorizer.lowercase,
+        "strip_accents": vectorizer.strip_accents,
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "sublinear_tf": vectorizer.sublinear_tf,
+    }
+    meta_path = os.path.join(output_dir, "meta.json")
+    with open(meta_path + ".tmp", 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+    # Left by retire_model_bundle; the bundle is current again
+    if os.path.exists(meta_path + ".stale"):
+        os.remove(meta_path + ".stale")
+
+    return output_dir
+
+def export_exact_matches(model, vectorizer, label_encoder, titles, categories, threshold=0.5,
+                         class_thresholds=None, min_confidence=0.5, output_dir="ml/sklearn/exact"):
+    """
+    Export the exact-match table: training titles the model labels right with high confidence
+
+    Labels and confidences come from the engine the server uses, so a table
+    hit returns what scoring the title would. Titles that normalize to the
+    same key must all agree; the first one's confidence is kept, as the
+    prediction cache does.
+    """
+    from ml.cache import normalize_title
+    from ml.engine import build_engine
+    from ml.exact import hash_keys
+    from ml.tfidf import TitleVectorizer
+
+    engine = build_engine(model, label_encoder, threshold, class_thresholds)
+    serving_vectorizer = TitleVectorizer.from_sklearn(vectorizer) or vectorizer
+    labels, confidences = engine.classify(serving_vectorizer.transform(titles))
+
+    known = {}
+    rejected = set()
+    for title, category, label, confidence in zip(titles, categories, labels, confidences):
+        key = normalize_title(title)
+        if label != category or confidence < min_confidence:
+            rejected.add(key)
+        else:
+            known.setdefault(key, (label, confidence))
+    keys = [key for key in known if key not in rejected]
+
+    classes = np.asarray(engine.classes, dtype=str)
+    if len(classes) > 256:
+        raise ValueError("The exact-match table stores labels as uint8")
+    class_index = {name: i for i, name in enumerate(classes)}
+
+    hashes = hash_keys(keys)
+    order = np.argsort(hashes, kind="stable")
+    hashes = hashes[order]
+    # Drop both sides of a 64-bit collision rather than serve a wrong label
+    collided = np.zeros(len(hashes), dtype=bool)
+    same = hashes[1:] == hashes[:-1]
+    collided[1:] |= same
+    collided[:-1] |= same
+    keep = order[~collided]
+
+    arrays = {
+        "hashes": hashes[~collided],
+        "labels": np.asarray([class_index[known[keys[i]][0]] for i in keep], dtype=np.uint8),
+        "confidences": np.asarray([known[keys[i]][1] for i in keep], dtype=np.float64),
+        "classes": classes,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    # Same temp-file-and-rename dance as the bundle; hashes.npy goes last
+    # because its presence is what marks a table as available
+    for name in ("labels", "confidences", "classes", "hashes"):
+        path = os.path.join(output_dir, f"{name}.npy")
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, arrays[name], allow_pickle=False)
+        os.replace(path + ".tmp", path)
+
+    print(f"Exact-match table: {len(keep)} of {len(set(map(normalize_title, titles)))} distinct titles")
+    return output_dir
+
 def main():
     """Main training pipeline with enhanced monitoring"""
     # Load data
@@ -239,6 +442,11 @@ def main():
         best_model, vectorizer, label_encoder, titles, categories
     )
     
+    # Per-class thresholds on top of the global one
+    class_thresholds = calculate_class_thresholds(
+        best_model, vectorizer, label_encoder, titles, categories, optimal_threshold
+    )
+
     # Prepare metadata
     metadata = {
         "training_samples": dataset_size,
@@ -246,11 +454,18 @@ def main():
         "feature_count": X.shape[1],
         "model_type": type(best_model).__name__,
         "threshold": float(optimal_threshold),
+        "class_thresholds": class_thresholds,
         "categories": list(label_encoder.classes_)
     }
     
-    # Save everything
-    save_model_components(best_model, vectorizer, label_encoder, optimal_threshold, metadata)
+    # Save everything. The old bundle goes first: if anything below fails,
+    # the server falls back to the new joblib files rather than the old bundle
+    retire_model_bundle()
+    save_model_components(best_model, vectorizer, label_encoder, optimal_threshold, metadata, class_thresholds)
+    export_model_bundle(best_model, vectorizer, label_encoder, optimal_threshold,
+                        class_thresholds=class_thresholds)
+    export_exact_matches(best_model, vectorizer, label_encoder, titles, categories,
+                         optimal_threshold, class_thresholds)
     print("Model saved successfully with metadata")
     
     # Final recommendations
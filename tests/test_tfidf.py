@@ -0,0 +1,52 @@
+"""TitleVectorizer must reproduce TfidfVectorizer.transform bit for bit"""
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from ml.bundle import load_bundle
+from ml.predict import BUNDLE_DIR, MODEL_DIR
+from ml.tfidf import TitleVectorizer
+
+DATA_PATH = os.path.join(os.path.dirname(MODEL_DIR), "data", "training_data_realistic.json")
+
+# Accented, empty, stop-word-only and punctuation-heavy titles
+EDGE_CASES = ["", "the and of", "Café résumé naïve – Ünïcödé", "ＦＵＬＬＷＩＤＴＨ ｔｅｘｔ", "C++ / C# / .NET"]
+
+
+@pytest.fixture(scope="module")
+def sklearn_vectorizer():
+    return joblib.load(os.path.join(MODEL_DIR, "vectorizer.joblib"))
+
+
+@pytest.fixture(scope="module")
+def titles():
+    with open(DATA_PATH) as f:
+        return [item["title"] for item in json.load(f)] + EDGE_CASES
+
+
+def assert_identical(expected, actual):
+    assert expected.shape == actual.shape
+    assert np.array_equal(expected.indptr, actual.indptr)
+    assert np.array_equal(expected.indices, actual.indices)
+    assert np.array_equal(expected.data, actual.data)
+
+
+@pytest.fixture(scope="module", params=["from_sklearn", "bundle"])
+def vectorizer(request, sklearn_vectorizer):
+    if request.param == "from_sklearn":
+        return TitleVectorizer.from_sklearn(sklearn_vectorizer)
+    return load_bundle(BUNDLE_DIR)[0]
+
+
+def test_batch_matches_sklearn(vectorizer, sklearn_vectorizer, titles):
+    assert vectorizer is not None
+    assert_identical(sklearn_vectorizer.transform(titles), vectorizer.transform(titles))
+
+
+def test_single_titles_match_sklearn(vectorizer, sklearn_vectorizer, titles):
+    # Row by row too, so batching can't hide a per-title difference
+    for title in titles[:300] + EDGE_CASES:
+        assert_identical(sklearn_vectorizer.transform([title]), vectorizer.transform([title]))